@@ -0,0 +1,174 @@
+"""
+Gym-style environments for training and play-testing bots.
+
+AsteroidEnv wraps one headless Game behind reset()/step() with the
+Gymnasium return signature, without depending on gym itself. Observations
+are flat float32 arrays and actions are ints whose bits press left (1),
+right (2) and space (4), the same bit layout InputRecorder uses.
+VectorAsteroidEnv steps many independent games in one call and returns
+batched arrays in the Gymnasium vector env shapes, auto-resetting games that
+finish.
+
+Observation layout (OBSERVATION_SIZE floats):
+    [0]       player x
+    [1]       lives
+    [2]       score
+    [3:15]    up to MAX_BULLETS bullets as (x, y, active)
+    [15:75]   up to MAX_ASTEROIDS asteroids as (x, y, vx, vy, present),
+              nearest to the bottom of the screen first
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from main import AsteroidSprites, Game, GameState, InputRecorder, ScriptedKeys, SpriteCache
+
+
+MAX_BULLETS = 4
+MAX_ASTEROIDS = 12
+BULLET_FEATURES = 3
+ASTEROID_FEATURES = 5
+BULLETS_OFFSET = 3
+ASTEROIDS_OFFSET = BULLETS_OFFSET + MAX_BULLETS * BULLET_FEATURES
+OBSERVATION_SIZE = ASTEROIDS_OFFSET + MAX_ASTEROIDS * ASTEROID_FEATURES
+NUM_ACTIONS = 8
+
+# One key state per action, built from the recorder's left/right/space bits
+ACTION_KEYS = [
+    ScriptedKeys(key for i, key in enumerate(InputRecorder.KEYS[:3]) if action & (1 << i))
+    for action in range(NUM_ACTIONS)
+]
+
+
+class AsteroidEnv:
+    """
+    Single headless game with a reset()/step() interface.
+
+    Each step advances the simulation by one tick. The reward is the score
+    gained minus the lives lost during the step. The game is simulation
+    only, and may share its sprites with other environments' games.
+    """
+
+    def __init__(self, seed: int = None, max_episode_steps: int = 36000,
+                 sprite_cache: SpriteCache = None, asteroid_sprites: AsteroidSprites = None):
+        self.game = Game(simulation_only=True, seed=seed, sprite_cache=sprite_cache,
+                         asteroid_sprites=asteroid_sprites)
+        self.max_episode_steps = max_episode_steps
+        self.steps = 0
+
+    def reset(self, seed: int = None) -> Tuple[np.ndarray, Dict]:
+        """Start a new game and return the first observation."""
+        self.game.start_level(1, seed=seed)
+        self.steps = 0
+        observation = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+        self.observe(observation)
+        return observation, {'seed': self.game.level_seed}
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict]:
+        """Advance one tick and return (observation, reward, terminated, truncated, info)."""
+        observation = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+        reward, terminated, truncated = self.step_into(action, observation)
+        return observation, reward, terminated, truncated, {}
+
+    def step_into(self, action: int, observation: np.ndarray) -> Tuple[float, bool, bool]:
+        """Advance one tick, writing the observation into a preallocated row."""
+        game = self.game
+        score, lives = game.score, game.lives
+
+        game.step(ACTION_KEYS[action])
+        self.steps += 1
+
+        self.observe(observation)
+        reward = float(game.score - score) - float(lives - game.lives)
+        terminated = game.state_manager.current_state == GameState.GAME_OVER
+        truncated = not terminated and self.steps >= self.max_episode_steps
+        return reward, terminated, truncated
+
+    def observe(self, out: np.ndarray):
+        """Write the current game state into out."""
+        game = self.game
+        out[:] = 0.0
+        out[0] = game.player.pos.x
+        out[1] = game.lives
+        out[2] = game.score
+
+        bullets = out[BULLETS_OFFSET:ASTEROIDS_OFFSET].reshape(MAX_BULLETS, BULLET_FEATURES)
+        for row, bullet in zip(bullets, game.bullets.active):
+            row[0] = bullet.pos.x
+            row[1] = bullet.pos.y
+            row[2] = 1.0
+
+        store = game.enemy_manager.asteroids
+        n = store.count
+        nearest = np.argsort(-store.y[:n], kind='stable')[:MAX_ASTEROIDS]
+        asteroids = out[ASTEROIDS_OFFSET:].reshape(MAX_ASTEROIDS, ASTEROID_FEATURES)
+        shown = len(nearest)
+        asteroids[:shown, 0] = store.x[nearest]
+        asteroids[:shown, 1] = store.y[nearest]
+        asteroids[:shown, 2] = store.x[nearest] - store.prev_x[nearest]
+        asteroids[:shown, 3] = store.y[nearest] - store.prev_y[nearest]
+        asteroids[:shown, 4] = 1.0
+
+
+class VectorAsteroidEnv:
+    """
+    Steps num_envs independent games in one call.
+
+    Observations, rewards and done flags come back as arrays with one row per
+    game, written into preallocated buffers that the next call overwrites.
+    Games that finish are reset immediately, so the returned row is already
+    the next episode's first observation. The finished episode's last
+    observation is in infos['final_observation'], with
+    infos['_final_observation'] marking the rows that hold one, so truncated
+    episodes can still be bootstrapped.
+
+    This is a Python loop over full games, not a vectorised simulation:
+    throughput is that of one game, about 12k env steps per second on one
+    core however many envs there are. The games share their sprites and
+    skip display and audio setup, so creating 16 takes about 15 ms. For more
+    throughput, run several of these in separate processes.
+    """
+
+    def __init__(self, num_envs: int, seed: int = None, max_episode_steps: int = 36000):
+        seeds = np.random.SeedSequence(seed).generate_state(num_envs)
+        # Every game shares the first one's decoded and rotated sprites
+        first = AsteroidEnv(int(seeds[0]), max_episode_steps)
+        self.envs: List[AsteroidEnv] = [first] + [
+            AsteroidEnv(int(s), max_episode_steps, sprite_cache=first.game.sprite_cache,
+                        asteroid_sprites=first.game.enemy_manager.sprites)
+            for s in seeds[1:]
+        ]
+        self.num_envs = num_envs
+        self.observations = np.zeros((num_envs, OBSERVATION_SIZE), dtype=np.float32)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=np.bool_)
+        self.truncated = np.zeros(num_envs, dtype=np.bool_)
+        self.final_observations = np.zeros((num_envs, OBSERVATION_SIZE), dtype=np.float32)
+        self.finished = np.zeros(num_envs, dtype=np.bool_)
+        self.seeds = np.zeros(num_envs, dtype=np.uint64)
+
+    def reset(self) -> Tuple[np.ndarray, Dict]:
+        """Start a new game in every environment and return (observations, infos)."""
+        for i, env in enumerate(self.envs):
+            self.observations[i], info = env.reset()
+            self.seeds[i] = info['seed']
+        return self.observations, {'seed': self.seeds}
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict]:
+        """Step every game and return (observations, rewards, terminated, truncated, infos)."""
+        self.finished[:] = False
+        for i, env in enumerate(self.envs):
+            reward, terminated, truncated = env.step_into(int(actions[i]), self.observations[i])
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            if terminated or truncated:
+                self.final_observations[i] = self.observations[i]
+                self.finished[i] = True
+                self.observations[i] = env.reset()[0]
+        infos = {}
+        if self.finished.any():
+            infos['final_observation'] = self.final_observations
+            infos['_final_observation'] = self.finished
+        return self.observations, self.rewards, self.terminated, self.truncated, infos
@@ -0,0 +1,239 @@
+"""
+Deterministic benchmarks for the game loop hot paths.
+
+Runs headlessly on the SDL dummy drivers with a fixed RNG seed, writes the
+results as JSON and compares them against a stored baseline. Every metric is
+a rate, so a result more than the threshold below its baseline is reported
+as a regression and the script exits with status 1. A short scripted session
+is also played through the real game loop first, and the script fails if the
+session stats it stores are implausible.
+
+    python bench.py                    # run and compare against the baseline
+    python bench.py --save-baseline    # run and store the results as baseline
+"""
+
+import os
+
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import pygame
+
+from main import EnemyManager, Game, GameState, ScoreStore
+
+
+ASTEROID_COUNTS = (12, 100, 1000, 10000)
+COLLISION_ASTEROID_COUNTS = (100, 1000, 10000)
+COLLISION_BULLETS = 8
+# Enough bullets in one volley for the queries to go through the spatial grid
+GRID_VOLLEY_BULLETS = EnemyManager.GRID_MIN_QUERIES
+
+
+def make_game(seed: int, asteroids: int = 1) -> Game:
+    """Create a headless game playing a seeded level with the given asteroid count."""
+    game = Game(headless=True, seed=seed)
+    game.enemy_manager.max_asteroids = max(asteroids, game.enemy_manager.max_asteroids)
+    game.start_level(asteroids, seed=seed)
+    return game
+
+
+def rate(iterations: int, body: Callable[[], None], repeats: int = 3) -> float:
+    """
+    Run body a fixed number of times and return calls per second.
+
+    The best of several repeats is kept, after one untimed warm-up call, to
+    keep scheduler noise out of the comparison.
+    """
+    body()
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            body()
+        elapsed = time.perf_counter() - start
+        best = max(best, iterations / elapsed if elapsed > 0 else float('inf'))
+    return best
+
+
+def bench_enemy_update(seed: int) -> Dict[str, float]:
+    """Ticks per second of EnemyManager.update at each asteroid count."""
+    results = {}
+    for count in ASTEROID_COUNTS:
+        game = make_game(seed, count)
+        manager = game.enemy_manager
+        iterations = max(200, 200000 // count)
+        results[f'enemy_update_{count}'] = rate(
+            iterations,
+            lambda: manager.update(game.difficulty_scaler, game.player.pos, game.score)
+        )
+    return results
+
+
+def bench_collisions(seed: int) -> Dict[str, float]:
+    """
+    Calls per second of Game._check_collisions with a full volley of bullets.
+
+    Each bullet is fired at the centre of a live asteroid, so every volley
+    exercises the hit path as well as the queries. Small volleys scan the
+    asteroids linearly; the grid_ volley is large enough to use the grid.
+    """
+    results = {}
+    cases = [(f'collisions_{count}', count, COLLISION_BULLETS)
+             for count in COLLISION_ASTEROID_COUNTS]
+    cases.append((f'collisions_grid_{COLLISION_ASTEROID_COUNTS[-1]}',
+                   COLLISION_ASTEROID_COUNTS[-1], GRID_VOLLEY_BULLETS))
+    for name, count, bullets in cases:
+        game = make_game(seed, count)
+        game.enemy_manager.update(game.difficulty_scaler, game.player.pos, game.score)
+        store = game.enemy_manager.asteroids
+
+        def volley():
+            game.bullets.clear()
+            # Hit asteroids respawn elsewhere, so aim at where they are now
+            for i in range(bullets):
+                game.bullets.fire(store.x[i] + store.width[i] / 2, store.y[i] + store.height[i] / 2)
+            destroyed = game.asteroids_destroyed
+            game._check_collisions()
+            assert game.asteroids_destroyed > destroyed, 'volley hit no asteroids'
+
+        results[name] = rate(max(200, 200000 // count), volley)
+    return results
+
+
+def bench_draw(seed: int) -> Dict[str, float]:
+    """Frames per second of the gameplay renderer and every menu screen."""
+    results = {}
+
+    game = make_game(seed, 12)
+    game.step(ticks=60)
+    results['draw_playing'] = rate(500, game._draw)
+
+    game.state_manager.transition(GameState.MENU)
+    results['draw_menu'] = rate(500, game._draw_menu)
+    results['draw_pause_menu'] = rate(500, game._draw_pause_menu)
+    results['draw_game_over'] = rate(500, game._draw_game_over)
+    return results
+
+
+class ScriptedGame(Game):
+    """
+    Headless game whose run() loop is fed a script of events.
+
+    Each loop iteration takes the next script entry: a list of events, or a
+    number of seconds to sleep. The game quits once the script runs out.
+    """
+
+    def __init__(self, script: List, **kwargs):
+        super().__init__(headless=True, **kwargs)
+        self.script = list(script)
+
+    def handle_events(self, events: List[pygame.event.Event] = None):
+        entry = self.script.pop(0) if self.script else [pygame.event.Event(pygame.QUIT)]
+        if not isinstance(entry, list):
+            time.sleep(entry)
+            entry = []
+        super().handle_events(list(events or []) + entry)
+
+
+def check_session_stats(seed: int) -> List[str]:
+    """
+    Play, pause, resume and quit a level through Game.run and check the stored session.
+
+    Waiting in the menu or on the pause screen must not count as frame
+    time, so the stored average frame time has to be below the longest
+    frame the loop will simulate.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        game = ScriptedGame(seed=seed, script=(
+            [[]]
+            + [[pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(400, 325))]]
+            + [[]] * 30
+            + [[pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE)], 0.5,
+               [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE)]]
+            + [[]] * 30
+        ))
+        game.scores = ScoreStore(os.path.join(directory, 'scores.db'))
+        game.run()
+        pygame.init()
+
+        scores = ScoreStore(os.path.join(directory, 'scores.db'))
+        sessions = scores.leaderboard()
+        scores.close()
+
+    if len(sessions) != 1:
+        return [f"expected 1 stored session, found {len(sessions)}"]
+    average = sessions[0].avg_frame_ms
+    if not 0.0 < average < Game.MAX_FRAME_TIME * 1000.0:
+        return [f"stored session averages {average:.1f} ms per frame"]
+    return []
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Get a line per metric that fell more than threshold below its baseline."""
+    regressions = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference and value < reference * (1.0 - threshold):
+            regressions.append(f"{name}: {value:.1f}/s vs baseline {reference:.1f}/s "
+                               f"({value / reference - 1.0:+.1%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Asteroid Attack benchmarks')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', default='bench_results.json',
+                        help='where to write the results')
+    parser.add_argument('--baseline', default='bench_baseline.json',
+                        help='stored results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='allowed fractional slowdown before failing')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store these results as the new baseline')
+    args = parser.parse_args()
+
+    failures = check_session_stats(args.seed)
+    for line in failures:
+        print(f"CHECK FAILED {line}")
+    if failures:
+        return 1
+
+    results: Dict[str, float] = {}
+    for bench in (bench_enemy_update, bench_collisions, bench_draw):
+        results.update(bench(args.seed))
+    pygame.quit()
+
+    for name, value in results.items():
+        print(f"{name:24s} {value:12.1f} /s")
+
+    with open(args.output, 'w') as f:
+        json.dump({'seed': args.seed, 'results': results}, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'seed': args.seed, 'results': results}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Packs the game assets into assets/assets.bundle.
+
+Sprites no larger than --max-sprite pixels on a side are packed into one
+atlas image so they share a single Surface, and every asset (the atlas
+included) is stored in one file that the game memory-maps at startup. The
+game falls back to the loose files under assets/ when the bundle is absent.
+
+    python build_assets.py
+"""
+
+import os
+
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+import argparse
+import io
+import json
+import struct
+import sys
+from typing import Dict, List, Tuple
+
+import pygame
+
+from main import AssetBundle, Assets
+
+
+ATLAS_NAME = 'images/atlas.png'
+ATLAS_WIDTH = 256
+PADDING = 1
+ALIGNMENT = 16
+# Only shipped for the README
+EXCLUDED = {'images/screenshot.png'}
+
+
+def collect(root: str) -> List[str]:
+    """Get the name of every asset under root, sorted for reproducible bundles."""
+    names = []
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            name = os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/')
+            if name != Assets.BUNDLE and name not in EXCLUDED:
+                names.append(name)
+    return sorted(names)
+
+
+def pack_atlas(sprites: Dict[str, pygame.Surface]) -> Tuple[pygame.Surface, Dict[str, List[int]]]:
+    """
+    Shelf-pack sprites into one image, tallest first.
+
+    Each sprite is padded so filtering at its edges never samples a neighbour.
+    """
+    frames = {}
+    x = y = shelf_height = 0
+    for name in sorted(sprites, key=lambda n: (-sprites[n].get_height(), n)):
+        width, height = sprites[name].get_size()
+        if x + width > ATLAS_WIDTH:
+            x, y = 0, y + shelf_height + PADDING
+            shelf_height = 0
+        frames[name] = [x, y, width, height]
+        x += width + PADDING
+        shelf_height = max(shelf_height, height)
+
+    atlas = pygame.Surface((ATLAS_WIDTH, y + shelf_height), pygame.SRCALPHA)
+    for name, (x, y, _, _) in frames.items():
+        atlas.blit(sprites[name], (x, y))
+    return atlas, frames
+
+
+def build(root: str, max_sprite: int) -> Tuple[bytes, Dict[str, List[int]]]:
+    """Read the assets under root and return the bundle bytes and atlas frames."""
+    contents: Dict[str, bytes] = {}
+    sprites: Dict[str, pygame.Surface] = {}
+    for name in collect(root):
+        path = os.path.join(root, *name.split('/'))
+        if name.endswith('.png'):
+            image = pygame.image.load(path)
+            if max(image.get_size()) <= max_sprite:
+                sprites[name] = image
+                continue
+        with open(path, 'rb') as f:
+            contents[name] = f.read()
+
+    frames: Dict[str, List[int]] = {}
+    if sprites:
+        atlas, frames = pack_atlas(sprites)
+        buffer = io.BytesIO()
+        pygame.image.save(atlas, buffer, ATLAS_NAME)
+        contents[ATLAS_NAME] = buffer.getvalue()
+
+    def layout(data_start: int) -> Tuple[Dict[str, List[int]], int]:
+        files, offset = {}, data_start
+        for name, data in contents.items():
+            offset += -offset % ALIGNMENT
+            files[name] = [offset, len(data)]
+            offset += len(data)
+        return files, offset
+
+    # The offsets depend on the index size, so lay out until they stop moving
+    data_start = 0
+    while True:
+        files, _ = layout(data_start)
+        index = json.dumps({
+            'files': files,
+            'atlas_image': ATLAS_NAME if frames else None,
+            'atlas_frames': frames,
+        }, separators=(',', ':')).encode('utf-8')
+        header_size = len(AssetBundle.MAGIC) + 4 + len(index)
+        aligned = header_size + -header_size % ALIGNMENT
+        if aligned == data_start:
+            break
+        data_start = aligned
+
+    out = bytearray(AssetBundle.MAGIC + struct.pack('<I', len(index)) + index)
+    for name, data in contents.items():
+        offset = files[name][0]
+        out.extend(bytes(offset - len(out)))
+        out.extend(data)
+    return bytes(out), frames
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Build the Asteroid Attack asset bundle')
+    parser.add_argument('--root', default=Assets.ROOT, help='asset directory')
+    parser.add_argument('--output', help='bundle path (default: ROOT/assets.bundle)')
+    parser.add_argument('--max-sprite', type=int, default=64,
+                        help='largest sprite side packed into the atlas')
+    args = parser.parse_args()
+
+    pygame.init()
+    bundle, frames = build(args.root, args.max_sprite)
+    pygame.quit()
+
+    output = args.output or os.path.join(args.root, Assets.BUNDLE)
+    # Write beside the target and rename, so a running game never maps a partial file
+    temp = output + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(bundle)
+    os.replace(temp, output)
+    print(f"Wrote {output}: {len(bundle) / 1024:.0f} KiB, {len(frames)} sprites in the atlas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
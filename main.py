@@ -1,10 +1,26 @@
-﻿import pygame
+﻿import os
+import csv
+import gc
+import io
+import json
+import mmap
+import pygame
 import random
 import math
+import queue
+import sqlite3
+import struct
+import threading
+import time
+import warnings
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+from itertools import islice
 from pygame import mixer
 from dataclasses import dataclass
-from typing import List, Tuple, Sequence
+from typing import BinaryIO, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Sequence
 
 
 # ============================================================================
@@ -54,6 +70,7 @@ class DifficultyScaler:
         self.spawn_scale_factor = 0.05  # increase by 0.05 per second
         self.base_speed = 2.0
         self.speed_scale_factor = 0.01  # 1% speed increase per score point
+        self.max_spawn_rate = 5.0  # cap at 5 asteroids per second
         self.elapsed_time = 0
     
     def update(self, dt: float):
@@ -64,7 +81,7 @@ class DifficultyScaler:
         """Get current spawn rate based on elapsed time."""
         return min(
             self.base_spawn_rate + (self.elapsed_time * self.spawn_scale_factor),
-            5.0  # cap at 5 asteroids per second
+            self.max_spawn_rate
         )
     
     def get_speed(self, score: int) -> float:
@@ -79,6 +96,569 @@ class DifficultyScaler:
         self.elapsed_time = 0
 
 
+# ============================================================================
+# ASSET MANAGEMENT
+# ============================================================================
+
+class MemoryReader(io.RawIOBase):
+    """Read-only, seekable file over a memoryview, so loaders read bundle bytes in place."""
+    
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = min(max(offset, 0), len(self._view))
+        return self._pos
+    
+    def tell(self) -> int:
+        return self._pos
+
+
+class AssetBundle:
+    """
+    Memory-mapped single-file asset archive written by build_assets.py.
+    
+    Layout: 8-byte magic, little-endian u32 index length, a UTF-8 JSON index
+    and the packed file contents. The index maps each asset name to its
+    (offset, size) and lists the sprite frames packed into the atlas image.
+    Asset bytes are served as memoryview slices of the map without copying.
+    """
+    
+    MAGIC = b'AABNDL01'
+    
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        
+        if bytes(self._view[:8]) != self.MAGIC:
+            raise ValueError(f"{path} is not an asset bundle")
+        (index_size,) = struct.unpack_from('<I', self._view, 8)
+        index = json.loads(bytes(self._view[12:12 + index_size]))
+        
+        self.files: Dict[str, Tuple[int, int]] = {
+            name: tuple(entry) for name, entry in index['files'].items()
+        }
+        self.atlas_image: Optional[str] = index.get('atlas_image')
+        self.atlas_frames: Dict[str, Tuple[int, int, int, int]] = {
+            name: tuple(rect) for name, rect in index.get('atlas_frames', {}).items()
+        }
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.files
+    
+    def view(self, name: str) -> memoryview:
+        """Get the bytes of an asset as a zero-copy view."""
+        offset, size = self.files[name]
+        return self._view[offset:offset + size]
+
+
+class Assets:
+    """
+    Resolves asset names such as 'images/heart.png'.
+    
+    Names are looked up in assets/assets.bundle when it has been built and
+    otherwise in the loose files under assets/. Both live next to this
+    module, so the game does not depend on the working directory.
+    """
+    
+    ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+    BUNDLE = 'assets.bundle'
+    
+    def __init__(self, root: str = ROOT):
+        self.root = root
+        bundle_path = os.path.join(root, self.BUNDLE)
+        self.bundle = AssetBundle(bundle_path) if os.path.exists(bundle_path) else None
+    
+    def path(self, name: str) -> str:
+        """Get the loose-file path of an asset."""
+        return os.path.join(self.root, *name.split('/'))
+    
+    def open(self, name: str) -> BinaryIO:
+        """Open an asset for reading, from the bundle when it has the asset."""
+        if self.bundle is not None and name in self.bundle:
+            return io.BufferedReader(MemoryReader(self.bundle.view(name)))
+        return open(self.path(name), 'rb')
+    
+    def atlas_frame(self, name: str) -> Optional[Tuple[int, int, int, int]]:
+        """Get the atlas rect of a packed sprite, or None if it is not in the atlas."""
+        if self.bundle is None:
+            return None
+        return self.bundle.atlas_frames.get(name)
+    
+    def load_image(self, name: str) -> pygame.Surface:
+        """Decode an image asset without converting it."""
+        with self.open(name) as f:
+            return pygame.image.load(f, name)
+    
+    def font(self, name: str, size: int) -> pygame.font.Font:
+        """Load a font asset; the font keeps reading from its file while alive."""
+        return pygame.font.Font(self.open(name), size)
+
+
+class LazySurface:
+    """
+    Handle to an image being decoded on a worker thread.
+    
+    The worker only decodes the file. Conversion to the display pixel format
+    needs the display, so it happens on the main thread in poll() once
+    decoding finished, or in get(), which waits for the worker if needed.
+    """
+    
+    def __init__(self, future: Future, alpha: bool):
+        self._future = future
+        self._alpha = alpha
+        self._surface = None
+    
+    def poll(self) -> bool:
+        """Convert the image if decoding finished. Returns whether it is ready."""
+        if self._surface is None and self._future.done():
+            self._finish()
+        return self._surface is not None
+    
+    def get(self) -> pygame.Surface:
+        """Get the converted Surface, waiting for the worker if still decoding."""
+        if self._surface is None:
+            self._finish()
+        return self._surface
+    
+    def _finish(self):
+        surface = self._future.result()
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if self._alpha else surface.convert()
+        self._surface = surface
+
+
+class SpriteCache:
+    """
+    Loads each image once and hands out the same Surface.
+    
+    Surfaces are converted to the display pixel format on first load so
+    blits do not have to convert per frame. Conversion needs an active
+    display mode, so the cache falls back to the raw Surface without one.
+    Sprites packed into the bundle's atlas are served as subsurfaces of the
+    one atlas Surface.
+    """
+    
+    def __init__(self, assets: Assets):
+        self.assets = assets
+        self._surfaces: Dict[str, pygame.Surface] = {}
+        self._masks: Dict[str, pygame.mask.Mask] = {}
+        self._lazy: Dict[str, LazySurface] = {}
+        self._executor = None
+        self._atlas = None
+    
+    def _convert(self, surface: pygame.Surface, alpha: bool) -> pygame.Surface:
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        return surface
+    
+    def get(self, name: str, alpha: bool = True) -> pygame.Surface:
+        """Get the cached Surface for an image asset, loading it on first use."""
+        surface = self._surfaces.get(name)
+        if surface is None:
+            frame = self.assets.atlas_frame(name)
+            if frame is not None:
+                if self._atlas is None:
+                    self._atlas = self._convert(self.assets.load_image(self.assets.bundle.atlas_image), True)
+                surface = self._atlas.subsurface(frame)
+            else:
+                surface = self._convert(self.assets.load_image(name), alpha)
+            self._surfaces[name] = surface
+        return surface
+    
+    def preload(self, names: Sequence[str], alpha: bool = True) -> List[pygame.Surface]:
+        """Load a group of images up front and return them in order."""
+        return [self.get(name, alpha) for name in names]
+    
+    def load_async(self, name: str, alpha: bool = True) -> LazySurface:
+        """Start decoding an image on the worker thread and return its handle."""
+        lazy = self._lazy.get(name)
+        if lazy is None:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='asset-loader')
+            lazy = LazySurface(self._executor.submit(self.assets.load_image, name), alpha)
+            self._lazy[name] = lazy
+        return lazy
+    
+    def close(self):
+        """Stop the loader thread, dropping decodes that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def get_mask(self, name: str) -> pygame.mask.Mask:
+        """Get the cached collision mask of an image's opaque pixels."""
+        mask = self._masks.get(name)
+        if mask is None:
+            mask = pygame.mask.from_surface(self.get(name))
+            self._masks[name] = mask
+        return mask
+
+
+class SoundBank:
+    """
+    Decodes sound effects once and plays them on a reserved channel pool.
+    
+    When every pooled channel is busy the one that started playing longest
+    ago is stolen, so rapid fire never allocates or drops the newest sound.
+    Without a working audio device, or with no channels, the bank stays empty
+    and play() is a no-op.
+    """
+    
+    def __init__(self, assets: Assets, num_channels: int = 8):
+        self.assets = assets
+        self.sounds: Dict[str, mixer.Sound] = {}
+        self.channels: List[mixer.Channel] = []
+        self._started: List[int] = []
+        self._play_count = 0
+        
+        if not num_channels:
+            return
+        try:
+            if mixer.get_init() is None:
+                mixer.init()
+            mixer.set_num_channels(max(mixer.get_num_channels(), num_channels))
+            mixer.set_reserved(num_channels)
+            self.channels = [mixer.Channel(i) for i in range(num_channels)]
+            self._started = [0] * num_channels
+        except pygame.error:
+            pass
+    
+    def load(self, name: str, asset: str, volume: float = 0.7):
+        """Decode a sound asset and register it under name."""
+        if not self.channels:
+            return
+        try:
+            with self.assets.open(asset) as f:
+                sound = mixer.Sound(file=f)
+        except (pygame.error, FileNotFoundError):
+            return
+        sound.set_volume(volume)
+        self.sounds[name] = sound
+    
+    def _acquire_channel(self) -> int:
+        """Get a free pooled channel, stealing the oldest voice if none is free."""
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return i
+        return self._started.index(min(self._started))
+    
+    def play(self, name: str):
+        """Play a registered sound on the channel pool."""
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        
+        i = self._acquire_channel()
+        self._play_count += 1
+        self._started[i] = self._play_count
+        self.channels[i].play(sound)
+
+
+# ============================================================================
+# COLLISION DETECTION
+# ============================================================================
+
+class SpatialGrid:
+    """
+    Uniform-grid broad phase over the playfield.
+    
+    Each entity is bucketed by the cell holding its top-left corner, and the
+    buckets are stored as one sorted index array plus per-cell offsets.
+    Queries widen the search rect up and left by the largest entity size, so
+    an entity overlapping the rect is always returned as a candidate.
+    """
+    
+    def __init__(self, width: int, height: int, cell_size: int = 64):
+        self.cell_size = cell_size
+        self.cols = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.max_width = 0
+        self.max_height = 0
+        self.order = np.zeros(0, dtype=np.intp)
+        self.starts = np.zeros(self.cols * self.rows + 1, dtype=np.intp)
+    
+    def _cells(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Get clamped cell columns and rows for positions."""
+        cx = np.clip(x // self.cell_size, 0, self.cols - 1).astype(np.intp)
+        cy = np.clip(y // self.cell_size, 0, self.rows - 1).astype(np.intp)
+        return cx, cy
+    
+    def rebuild(self, x: np.ndarray, y: np.ndarray, width: np.ndarray, height: np.ndarray):
+        """Re-bucket every entity from its current position."""
+        cx, cy = self._cells(x, y)
+        cells = cy * self.cols + cx
+        self.order = np.argsort(cells, kind='stable')
+        counts = np.bincount(cells, minlength=self.cols * self.rows)
+        self.starts[1:] = np.cumsum(counts)
+        self.max_width = int(width.max()) if len(width) else 0
+        self.max_height = int(height.max()) if len(height) else 0
+    
+    def _cell(self, x: int, y: int) -> Tuple[int, int]:
+        """Get the clamped cell column and row for a single point."""
+        col = min(max(x // self.cell_size, 0), self.cols - 1)
+        row = min(max(y // self.cell_size, 0), self.rows - 1)
+        return col, row
+    
+    def query(self, rect: pygame.Rect) -> np.ndarray:
+        """Get indices of entities that may overlap rect."""
+        c0, r0 = self._cell(rect.left - self.max_width, rect.top - self.max_height)
+        c1, r1 = self._cell(rect.right, rect.bottom)
+        
+        order = self.order
+        starts = self.starts
+        if r0 == r1:
+            first = r0 * self.cols
+            return order[starts[first + c0]:starts[first + c1 + 1]]
+        
+        # Cells in a row are contiguous in the sorted order
+        return np.concatenate([
+            order[starts[row * self.cols + c0]:starts[row * self.cols + c1 + 1]]
+            for row in range(r0, r1 + 1)
+        ])
+
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+class DirtyRectTracker:
+    """
+    Tracks which screen regions changed between gameplay frames.
+    
+    Regions drawn last frame are erased back to the background and pushed
+    together with the regions drawn this frame, so only those parts of the
+    display are updated. invalidate() requests a full redraw, which is also
+    used when so many regions changed that partial updates stop paying off.
+    """
+    
+    MAX_RECTS = 200
+    
+    def __init__(self):
+        self.previous: List[pygame.Rect] = []
+        self.current: List[pygame.Rect] = []
+        self.full_redraw = True
+    
+    def invalidate(self):
+        """Force the next frame to redraw and push the whole screen."""
+        self.full_redraw = True
+    
+    def erase(self, surface: pygame.Surface, background: pygame.Surface):
+        """Restore the background under everything drawn last frame."""
+        for rect in self.previous:
+            surface.blit(background, rect, rect)
+    
+    def add(self, rect: pygame.Rect):
+        """Mark a region drawn this frame."""
+        self.current.append(rect)
+    
+    def present(self):
+        """Push the changed regions to the display and start a new frame."""
+        if self.full_redraw or len(self.previous) + len(self.current) > self.MAX_RECTS:
+            pygame.display.update()
+        else:
+            self.previous.extend(self.current)
+            pygame.display.update(self.previous)
+        
+        self.previous, self.current = self.current, self.previous
+        self.current.clear()
+        self.full_redraw = False
+
+
+class RenderQueue:
+    """
+    Collects sprites over a frame and draws them with one blits() call.
+    
+    Every entry is a persistent [image, Rect] pair updated in place, with
+    the blit position in the Rect's top-left. Entities own their pair and
+    array-backed batches borrow pairs from a pool that only grows, so
+    queueing sprites allocates nothing once the pool is large enough.
+    """
+    
+    def __init__(self):
+        self.items: List[list] = []
+        self._pool: List[list] = []
+        self._pooled = 0
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def add(self, item: list):
+        """Queue an entity's [image, Rect] pair."""
+        self.items.append(item)
+    
+    def add_batch(self, images: Sequence[pygame.Surface], indices: Iterable[int],
+                  xs: Sequence[int], ys: Sequence[int]):
+        """Queue images[i] at (x, y) for every (i, x, y) using pooled pairs."""
+        pool = self._pool
+        start = self._pooled
+        end = start + len(xs)
+        while len(pool) < end:
+            pool.append([None, pygame.Rect(0, 0, 0, 0)])
+        
+        items = self.items
+        for item, i, x, y in zip(islice(pool, start, end), indices, xs, ys):
+            item[0] = images[i]
+            dest = item[1]
+            dest.x = x
+            dest.y = y
+            items.append(item)
+        self._pooled = end
+    
+    def flush(self, surface: pygame.Surface, rects: List[pygame.Rect] = None):
+        """Draw everything queued in order and empty the queue, collecting covered areas into rects."""
+        if rects is None:
+            surface.blits(self.items, doreturn=False)
+        else:
+            rects.extend(surface.blits(self.items))
+        self.items.clear()
+        self._pooled = 0
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces.
+    
+    Keyed by (font, text, color, antialias), so static labels are only
+    rasterised once and the least recently used entries are evicted first.
+    """
+    
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._surfaces: OrderedDict = OrderedDict()
+    
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int],
+               antialias: bool = True) -> pygame.Surface:
+        """Get the rendered surface for text, rasterising it on a miss."""
+        key = (font, text, color, antialias)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, antialias, color)
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self.max_entries:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+
+class AsteroidSprites:
+    """
+    Pre-rendered rotation frames of each asteroid image at several scales.
+    
+    Rotating and scaling per asteroid per frame is far too slow, so every
+    (image, scale) variant is rendered once per angle with rotozoom and each
+    asteroid draws the frame nearest its angle. Variants are numbered image
+    by image, then scale by scale, and frames angle by angle within each
+    variant. When the frames would not fit in budget bytes the rotation
+    count is halved until they do.
+    
+    The cached frames are only for drawing. Each variant has a fixed hitbox,
+    the opaque bounds of its unrotated image, and each frame is blitted
+    centred on it. Pixel-perfect collisions use masks at a fixed
+    MASK_ANGLES rotations, so gameplay never depends on the frame count or
+    budget.
+    """
+    
+    SCALES = (0.75, 1.0, 1.5)
+    FRAME_COUNT = 32
+    MASK_ANGLES = 32
+    BUDGET = 4 * 1024 * 1024
+    
+    def __init__(self, images: Sequence[pygame.Surface], scales: Sequence[float] = SCALES,
+                 frame_count: int = FRAME_COUNT, budget: int = BUDGET):
+        self.images = list(images)
+        self.scales = tuple(scales)
+        self.frame_count = self._fit(images, self.scales, frame_count, budget)
+        self.surfaces: List[pygame.Surface] = []
+        self._masks: Dict[Tuple[int, int], Tuple[pygame.mask.Mask, int, int]] = {}
+        
+        hitboxes = []
+        offsets = []
+        convert = pygame.display.get_surface() is not None
+        step = 360.0 / self.frame_count
+        for image in self.images:
+            for scale in self.scales:
+                rect = pygame.transform.rotozoom(image, 0.0, scale).get_bounding_rect()
+                width, height = max(rect.width, 1), max(rect.height, 1)
+                hitboxes.append((width, height))
+                for i in range(self.frame_count):
+                    surface = pygame.transform.rotozoom(image, i * step, scale)
+                    if convert:
+                        surface = surface.convert_alpha()
+                    self.surfaces.append(surface)
+                    offsets.append(((surface.get_width() - width) // 2,
+                                    (surface.get_height() - height) // 2))
+        
+        self.hit_width, self.hit_height = (np.array(c, dtype=np.intp) for c in zip(*hitboxes))
+        self.offset_x, self.offset_y = (np.array(c, dtype=np.intp) for c in zip(*offsets))
+        self.bytes = sum(
+            surface.get_width() * surface.get_height() * surface.get_bytesize()
+            for surface in self.surfaces
+        )
+    
+    @staticmethod
+    def _fit(images: Sequence[pygame.Surface], scales: Sequence[float],
+             frame_count: int, budget: int) -> int:
+        """Get the largest rotation count, halving from frame_count, whose frames fit budget."""
+        # A rotated frame is at most the scaled image's diagonal on a side
+        per_angle = sum(
+            4 * math.ceil(math.hypot(*image.get_size()) * scale + 2) ** 2
+            for image in images for scale in scales
+        )
+        frame_count = max(1, frame_count)
+        while frame_count > 1 and per_angle * frame_count > budget:
+            frame_count //= 2
+        return frame_count
+    
+    def variant(self, image_index: int, scale_index: int) -> int:
+        """Get the number of an (image, scale) variant."""
+        return image_index * len(self.scales) + scale_index
+    
+    def frame(self, variant, angle) -> np.ndarray:
+        """Get the frame numbers nearest angle degrees for the given variants."""
+        steps = np.rint(np.asarray(angle) * (self.frame_count / 360.0)).astype(np.intp)
+        return variant * self.frame_count + steps % self.frame_count
+    
+    def collision_mask(self, variant: int, angle: float) -> Tuple[pygame.mask.Mask, int, int]:
+        """
+        Get the mask of a variant's opaque pixels at the nearest mask angle.
+        
+        Also returns how far the mask's top-left sits up and left of the
+        hitbox. Masks are rendered on first use and cached.
+        """
+        step = int(round(angle * self.MASK_ANGLES / 360.0)) % self.MASK_ANGLES
+        entry = self._masks.get((variant, step))
+        if entry is None:
+            image = self.images[variant // len(self.scales)]
+            scale = self.scales[variant % len(self.scales)]
+            surface = pygame.transform.rotozoom(image, step * 360.0 / self.MASK_ANGLES, scale)
+            entry = (pygame.mask.from_surface(surface),
+                     (surface.get_width() - int(self.hit_width[variant])) // 2,
+                     (surface.get_height() - int(self.hit_height[variant])) // 2)
+            self._masks[(variant, step)] = entry
+        return entry
+
+
 # ============================================================================
 # GAME ENTITIES
 # ============================================================================
@@ -86,31 +666,62 @@ class DifficultyScaler:
 @dataclass
 class Vector2:
     """Simple 2D vector."""
+    __slots__ = ('x', 'y')
     x: float
     y: float
 
 
 class Entity:
-    """Base class for all game entities."""
+    """
+    Base class for all game entities.
+    
+    Entities are slotted, so they carry no per-instance __dict__. rect is
+    the collision box, moved along with pos by sync_rect(), and draw_item is
+    the persistent [image, Rect] pair the entity queues for rendering.
+    """
+    
+    __slots__ = ('pos', 'prev', 'image', 'width', 'height', 'rect', 'draw_item')
     
     def __init__(self, x: float, y: float, image: pygame.Surface):
         self.pos = Vector2(x, y)
+        self.prev = Vector2(x, y)
         self.image = image
         self.width = image.get_width()
         self.height = image.get_height()
+        self.rect = pygame.Rect(int(x), int(y), self.width, self.height)
+        self.draw_item = [image, pygame.Rect(self.rect)]
+    
+    def save_position(self):
+        """Remember the current position as the start of the next tick."""
+        self.prev.x = self.pos.x
+        self.prev.y = self.pos.y
     
-    def draw(self, surface: pygame.Surface, offset: Tuple[int, int] = (0, 0)):
-        """Draw entity on surface."""
-        surface.blit(self.image, (self.pos.x + offset[0], self.pos.y + offset[1]))
+    def sync_rect(self):
+        """Move the collision box to the current position."""
+        self.rect.x = int(self.pos.x)
+        self.rect.y = int(self.pos.y)
+    
+    def submit(self, render_queue: RenderQueue, offset: Tuple[int, int] = (0, 0), alpha: float = 1.0):
+        """
+        Queue the entity for drawing.
+        
+        alpha interpolates between the previous and current tick positions.
+        """
+        dest = self.draw_item[1]
+        dest.x = int(self.prev.x + (self.pos.x - self.prev.x) * alpha + offset[0])
+        dest.y = int(self.prev.y + (self.pos.y - self.prev.y) * alpha + offset[1])
+        render_queue.add(self.draw_item)
     
-    def get_rect(self):
-        """Get rectangle for collision detection."""
-        return pygame.Rect(self.pos.x, self.pos.y, self.width, self.height)
+    def get_rect(self) -> pygame.Rect:
+        """Get the collision box, which is kept in sync with the position."""
+        return self.rect
 
 
 class Player(Entity):
     """Player spaceship entity."""
     
+    __slots__ = ('velocity',)
+    
     SPEED = 7
     BOUNDARY_LEFT = 0
     BOUNDARY_RIGHT = 736
@@ -128,139 +739,1143 @@ class Player(Entity):
         else:
             self.velocity = 0
     
-    def update(self):
-        """Update player position."""
-        self.pos.x += self.velocity
+    def update(self, scale: float = 1.0):
+        """Update player position by scale reference ticks."""
+        self.save_position()
+        self.pos.x += self.velocity * scale
         
         # Boundary checking
         if self.pos.x <= self.BOUNDARY_LEFT:
             self.pos.x = self.BOUNDARY_LEFT
         elif self.pos.x >= self.BOUNDARY_RIGHT:
             self.pos.x = self.BOUNDARY_RIGHT
+        self.sync_rect()
 
 
 class Bullet(Entity):
     """Projectile/bullet entity."""
     
+    __slots__ = ('active', 'dx', 'slot')
+    
     SPEED = 7
     
     def __init__(self, x: float, y: float, image: pygame.Surface):
         super().__init__(x, y, image)
         self.active = False
+        self.dx = 0.0
+        self.slot = -1
     
-    def fire(self, x: float, y: float):
-        """Fire bullet from given position."""
+    def fire(self, x: float, y: float, dx: float = 0.0):
+        """Fire bullet from given position, optionally angled sideways."""
         self.pos.x = x
         self.pos.y = y
+        self.save_position()
+        self.sync_rect()
+        self.dx = dx
         self.active = True
     
-    def update(self):
-        """Update bullet position."""
+    def update(self, scale: float = 1.0):
+        """Update bullet position by scale reference ticks."""
         if self.active:
-            self.pos.y -= self.SPEED
+            self.save_position()
+            self.pos.x += self.dx * scale
+            self.pos.y -= self.SPEED * scale
+            self.sync_rect()
             if self.pos.y < 0:
                 self.active = False
 
 
-class Asteroid(Entity):
-    """Asteroid enemy entity with AI behavior."""
+class BulletPool:
+    """
+    Fixed-capacity pool of preallocated bullets.
     
-    def __init__(self, x: float, y: float, image: pygame.Surface, speed: float = 2.0):
-        super().__init__(x, y, image)
-        self.speed = speed
-        self.drift_speed = random.uniform(0.5, 2.0)
-        self.drift_direction = random.choice([-1, 1])
-        self.homing_chance = 0.02  # 2% chance to target player
-        self.is_homing = False
-        self.lifetime = 0
-    
-    def set_difficulty_speed(self, speed: float):
-        """Update speed based on difficulty."""
-        self.speed = speed
-    
-    def update(self, player_pos: Vector2 = None):
-        """
-        Update asteroid position with smart behavior.
-        Drifts horizontally with variance, occasionally homes toward player.
-        """
-        self.lifetime += 1
+    Idle bullets sit on a free list and live bullets are kept packed at the
+    front of the active list, so firing, releasing and iterating never
+    allocate. Releasing swaps the last live bullet into the freed slot.
+    """
+    
+    def __init__(self, image: pygame.Surface, capacity: int = 32):
+        self.free: List[Bullet] = [Bullet(0, 0, image) for _ in range(capacity)]
+        self.active: List[Bullet] = []
+    
+    def __len__(self) -> int:
+        return len(self.active)
+    
+    def fire(self, x: float, y: float, dx: float = 0.0) -> bool:
+        """Fire a bullet from the pool. Returns False if the pool is exhausted."""
+        if not self.free:
+            return False
+        
+        bullet = self.free.pop()
+        bullet.fire(x, y, dx)
+        bullet.slot = len(self.active)
+        self.active.append(bullet)
+        return True
+    
+    def release(self, bullet: Bullet):
+        """Return a live bullet to the free list."""
+        last = self.active.pop()
+        if last is not bullet:
+            self.active[bullet.slot] = last
+            last.slot = bullet.slot
+        bullet.active = False
+        bullet.slot = -1
+        self.free.append(bullet)
+    
+    def update(self, scale: float = 1.0):
+        """Move live bullets and release the ones that left the screen."""
+        active = self.active
+        # Walk backwards so a release only swaps in an already-updated bullet
+        for i in range(len(active) - 1, -1, -1):
+            bullet = active[i]
+            bullet.update(scale)
+            if not bullet.active:
+                self.release(bullet)
+    
+    def clear(self):
+        """Release every live bullet."""
+        while self.active:
+            self.release(self.active[-1])
+    
+    def submit(self, render_queue: RenderQueue, offset: Tuple[int, int] = (0, 0), alpha: float = 1.0):
+        """Queue all live bullets for drawing."""
+        for bullet in self.active:
+            bullet.submit(render_queue, offset, alpha)
+
+
+class AsteroidStore:
+    """
+    Structure-of-arrays storage for asteroid enemies.
+    
+    Every attribute lives in its own NumPy array indexed by slot, so update()
+    applies the asteroid behavior to all asteroids in batched operations:
+    - Always falls by speed and drifts by drift_speed * drift_direction
+    - 2% chance per tick to start homing, moving 1px toward the player
+      until its lifetime reaches a multiple of 60
+    - Wraps horizontally between 0 and 800
+    - 1% chance per tick to flip drift direction
+    - Spins by spin degrees per tick
+    
+    Rates are per reference tick (1/60 s); update() scales them for other
+    tick lengths. The previous position is kept for render interpolation.
+    Up to SCALAR_MAX asteroids, the usual game load, a plain loop beats the
+    fixed cost of the NumPy calls; it draws the same random numbers and does
+    the same arithmetic, so both paths give identical results.
+    """
+    
+    HOMING_CHANCE = 0.02
+    FLIP_CHANCE = 0.01
+    WRAP_WIDTH = 800
+    SCALAR_MAX = 24
+    
+    FIELDS = (
+        ('x', np.float64),
+        ('y', np.float64),
+        ('prev_x', np.float64),
+        ('prev_y', np.float64),
+        ('speed', np.float64),
+        ('drift_speed', np.float64),
+        ('drift_direction', np.float64),
+        ('is_homing', np.bool_),
+        ('lifetime', np.float64),
+        ('angle', np.float64),
+        ('spin', np.float64),
+        ('variant', np.intp),
+        ('width', np.int64),
+        ('height', np.int64),
+    )
+    
+    def __init__(self, capacity: int = 16, rng: np.random.Generator = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.count = 0
+        self.capacity = 0
+        self._grow(capacity)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _grow(self, capacity: int):
+        """Reallocate every field array with a new capacity, keeping live slots."""
+        for name, dtype in self.FIELDS:
+            array = np.zeros(capacity, dtype=dtype)
+            if self.count:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+    
+    def clear(self):
+        """Remove all asteroids."""
+        self.count = 0
+    
+    def add(self, x: float, y: float, speed: float, variant: int, width: int, height: int,
+            angle: float = 0.0, spin: float = 0.0):
+        """Append an asteroid with a random drift."""
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        
+        i = self.count
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = y
+        self.speed[i] = speed
+        self.drift_speed[i] = self.rng.uniform(0.5, 2.0)
+        self.drift_direction[i] = self.rng.choice((-1, 1))
+        self.is_homing[i] = False
+        self.lifetime[i] = 0
+        self.angle[i] = angle
+        self.spin[i] = spin
+        self.variant[i] = variant
+        self.width[i] = width
+        self.height[i] = height
+        self.count += 1
+    
+    def set_speed(self, speed: float):
+        """Update speed of every asteroid based on difficulty."""
+        self.speed[:self.count] = speed
+    
+    def update(self, player_x: float = None, scale: float = 1.0):
+        """Advance every asteroid by scale reference ticks."""
+        n = self.count
+        if n == 0:
+            return
+        if n <= self.SCALAR_MAX:
+            self._update_scalar(n, player_x, scale)
+            return
+        
+        x = self.x[:n]
+        lifetime = self.lifetime[:n]
+        is_homing = self.is_homing[:n]
+        
+        self.prev_x[:n] = x
+        self.prev_y[:n] = self.y[:n]
+        lifetime += scale
         
         # Vertical movement (always falling)
-        self.pos.y += self.speed
+        self.y[:n] += self.speed[:n] * scale
         
         # Horizontal drift with variance
-        self.pos.x += self.drift_speed * self.drift_direction
+        x += self.drift_speed[:n] * self.drift_direction[:n] * scale
         
         # Occasional homing behavior (light AI)
-        if player_pos and random.random() < self.homing_chance and not self.is_homing:
-            self.is_homing = True
-        
-        if self.is_homing and player_pos:
-            if self.pos.x < player_pos.x:
-                self.pos.x += 1
-            elif self.pos.x > player_pos.x:
-                self.pos.x -= 1
-            
-            if self.lifetime % 60 == 0:
-                self.is_homing = False
+        if player_x is not None:
+            is_homing |= self.rng.random(n) < self._chance(self.HOMING_CHANCE, scale)
+            x += np.sign(player_x - x) * is_homing * scale
+            # Stop homing once lifetime crosses a multiple of 60
+            is_homing &= lifetime // 60 == (lifetime - scale) // 60
         
         # Boundary wrapping
-        if self.pos.x < 0:
-            self.pos.x = 800
-        elif self.pos.x > 800:
-            self.pos.x = 0
+        wrapped = x < 0
+        x[wrapped] = self.WRAP_WIDTH
+        self.prev_x[:n][wrapped] = self.WRAP_WIDTH
+        wrapped = x > self.WRAP_WIDTH
+        x[wrapped] = 0
+        self.prev_x[:n][wrapped] = 0
         
         # Occasional direction change
-        if random.random() < 0.01:
-            self.drift_direction *= -1
+        flips = self.rng.random(n) < self._chance(self.FLIP_CHANCE, scale)
+        self.drift_direction[:n][flips] *= -1
+        
+        angle = self.angle[:n]
+        angle += self.spin[:n] * scale
+        angle %= 360.0
+    
+    def _update_scalar(self, n: int, player_x: Optional[float], scale: float):
+        """update() for a few asteroids, one at a time on Python floats."""
+        # One draw covers both rolls, in the order the batched path takes them
+        rolls = self.rng.random(n if player_x is None else 2 * n).tolist()
+        flip_rolls = rolls[-n:]
+        homing_chance = self._chance(self.HOMING_CHANCE, scale)
+        flip_chance = self._chance(self.FLIP_CHANCE, scale)
+        wrap = float(self.WRAP_WIDTH)
+        
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        xs = self.x[:n].tolist()
+        ys = self.y[:n].tolist()
+        lifetime = self.lifetime[:n].tolist()
+        angle = self.angle[:n].tolist()
+        speed = self.speed[:n].tolist()
+        drift_speed = self.drift_speed[:n].tolist()
+        drift_direction = self.drift_direction[:n].tolist()
+        is_homing = self.is_homing[:n].tolist()
+        spin = self.spin[:n].tolist()
+        
+        for i in range(n):
+            life = lifetime[i] + scale
+            lifetime[i] = life
+            ys[i] += speed[i] * scale
+            x = xs[i] + drift_speed[i] * drift_direction[i] * scale
+            
+            # Homing and direction changes are rare, so those write back singly
+            if player_x is not None and (is_homing[i] or rolls[i] < homing_chance):
+                x += ((player_x > x) - (player_x < x)) * scale
+                homing = life // 60 == (life - scale) // 60
+                if homing != is_homing[i]:
+                    self.is_homing[i] = homing
+            
+            if x < 0:
+                x = wrap
+                self.prev_x[i] = x
+            elif x > wrap:
+                x = 0.0
+                self.prev_x[i] = x
+            xs[i] = x
+            
+            if flip_rolls[i] < flip_chance:
+                self.drift_direction[i] = -drift_direction[i]
+            angle[i] = (angle[i] + spin[i] * scale) % 360.0
+        
+        self.x[:n] = xs
+        self.y[:n] = ys
+        self.lifetime[:n] = lifetime
+        self.angle[:n] = angle
+    
+    @staticmethod
+    def _chance(chance: float, scale: float) -> float:
+        """Convert a per-tick chance to one over scale ticks."""
+        if scale == 1.0:
+            return chance
+        return 1.0 - (1.0 - chance) ** scale
+    
+    def respawn(self, indices: np.ndarray):
+        """Move asteroids back to a random spot near the top of the screen."""
+        self.x[indices] = self.prev_x[indices] = self.rng.integers(0, 766, len(indices))
+        self.y[indices] = self.prev_y[indices] = self.rng.integers(0, 51, len(indices))
+    
+    def collide_rect(self, rect: pygame.Rect, indices: np.ndarray = None) -> np.ndarray:
+        """
+        Get indices of asteroids whose bounds overlap rect.
+        
+        Tests every asteroid, or only the candidate indices when given.
+        Either way the hits come back in ascending index order.
+        """
+        if indices is None:
+            n = self.count
+            left = self.x[:n].astype(np.int64)
+            top = self.y[:n].astype(np.int64)
+            hits = (
+                (left < rect.right) & (left + self.width[:n] > rect.left) &
+                (top < rect.bottom) & (top + self.height[:n] > rect.top)
+            )
+            return np.flatnonzero(hits)
+        left = self.x[indices].astype(np.int64)
+        top = self.y[indices].astype(np.int64)
+        hits = (
+            (left < rect.right) & (left + self.width[indices] > rect.left) &
+            (top < rect.bottom) & (top + self.height[indices] > rect.top)
+        )
+        # Hits in index order, as a full scan finds them, so respawns draw the same randomness
+        return np.sort(indices[hits])
 
 
 class EnemyManager:
     """Manages all asteroid enemies."""
     
     ASTEROID_IMAGES = [
-        './assets/images/asteroid1.png',
-        './assets/images/asteroid2.png',
-        './assets/images/asteroid3.png'
+        'images/asteroid1.png',
+        'images/asteroid2.png',
+        'images/asteroid3.png'
     ]
+    MAX_ASTEROIDS = 12
+    # A grid rebuild costs 10-40 linear scans, so the grid only pays off when
+    # enough queries share one rebuild, and never for small populations
+    GRID_MIN_QUERIES = 24
+    GRID_MIN_ASTEROIDS = 1024
+    MAX_SPIN = 3.0  # degrees per tick
     
-    def __init__(self):
-        self.asteroids: List[Asteroid] = []
+    def __init__(self, sprite_cache: SpriteCache, rng: np.random.Generator = None,
+                 frame_count: int = AsteroidSprites.FRAME_COUNT,
+                 sprite_budget: int = AsteroidSprites.BUDGET,
+                 sprites: AsteroidSprites = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.asteroids = AsteroidStore(rng=self.rng)
+        self.asteroid_images = sprite_cache.preload(self.ASTEROID_IMAGES)
+        # Sprites hold no per-game state, so games may share one set
+        if sprites is None:
+            sprites = AsteroidSprites(self.asteroid_images, frame_count=frame_count,
+                                      budget=sprite_budget)
+        self.sprites = sprites
+        self.max_asteroids = self.MAX_ASTEROIDS
+        self.grid = SpatialGrid(800, 600)
+        self._grid_stale = True
+    
+    def seed(self, rng: np.random.Generator):
+        """Draw all enemy randomness from rng from now on."""
+        self.rng = rng
+        self.asteroids.rng = rng
     
     def initialize_level(self, num_asteroids: int):
         """Initialize asteroids for a level."""
         self.asteroids.clear()
         for _ in range(num_asteroids):
             self._spawn_asteroid()
+        self._grid_stale = True
     
     def _spawn_asteroid(self, x: float = None, y: float = None, speed: float = 2.0):
         """Spawn a single asteroid."""
         if x is None:
-            x = random.randint(0, 765)
+            x = int(self.rng.integers(0, 766))
         if y is None:
-            y = random.randint(0, 50)
+            y = int(self.rng.integers(0, 51))
+        
+        sprites = self.sprites
+        image_index = int(self.rng.integers(len(self.asteroid_images)))
+        scale_index = int(self.rng.integers(len(sprites.scales)))
+        angle = self.rng.uniform(0.0, 360.0)
+        spin = self.rng.uniform(-self.MAX_SPIN, self.MAX_SPIN)
         
-        image = pygame.image.load(random.choice(self.ASTEROID_IMAGES))
-        asteroid = Asteroid(x, y, image, speed)
-        self.asteroids.append(asteroid)
+        variant = sprites.variant(image_index, scale_index)
+        self.asteroids.add(x, y, speed, variant, sprites.hit_width[variant],
+                           sprites.hit_height[variant], angle, spin)
     
-    def update(self, difficulty_scaler: DifficultyScaler, player_pos: Vector2, score: int):
+    def update(self, difficulty_scaler: DifficultyScaler, player_pos: Vector2, score: int,
+               scale: float = 1.0):
         """Update all asteroids and handle spawning based on difficulty."""
         speed = difficulty_scaler.get_speed(score)
-        for asteroid in self.asteroids:
-            asteroid.set_difficulty_speed(speed)
-            asteroid.update(player_pos)
+        self.asteroids.set_speed(speed)
+        self.asteroids.update(player_pos.x if player_pos else None, scale)
         
         # Spawn new asteroids based on difficulty scaling
         spawn_rate = difficulty_scaler.get_spawn_rate()
-        spawn_probability = spawn_rate / 60  # per-frame probability at 60 FPS
+        spawn_probability = spawn_rate / 60 * scale  # per-tick probability (60 ticks/s reference)
         
-        if random.random() < spawn_probability and len(self.asteroids) < 12:
+        if self.rng.random() < spawn_probability and len(self.asteroids) < self.max_asteroids:
             self._spawn_asteroid(speed=speed)
+        
+        self._grid_stale = True
+    
+    def _rebuild_grid(self):
+        """Re-bucket asteroids in the broad-phase grid."""
+        store = self.asteroids
+        n = store.count
+        self.grid.rebuild(store.x[:n], store.y[:n], store.width[:n], store.height[:n])
+    
+    def respawn(self, indices: np.ndarray):
+        """Move asteroids back to the top of the screen."""
+        self.asteroids.respawn(indices)
+        self._grid_stale = True
+    
+    def query_rect(self, rect: pygame.Rect, queries: int = 1) -> np.ndarray:
+        """
+        Get indices of asteroids overlapping rect.
+        
+        queries is how many queries, this one included, the caller will make
+        before the asteroids next move. Fewer than GRID_MIN_QUERIES, or a
+        small population, are scanned linearly. Otherwise the query goes
+        through the grid, rebuilt on the first query after the asteroids
+        moved or respawned.
+        """
+        if queries < self.GRID_MIN_QUERIES or self.asteroids.count < self.GRID_MIN_ASTEROIDS:
+            return self.asteroids.collide_rect(rect)
+        if self._grid_stale:
+            self._rebuild_grid()
+            self._grid_stale = False
+        candidates = self.grid.query(rect)
+        return self.asteroids.collide_rect(rect, candidates)
+    
+    def mask_hits(self, indices: np.ndarray, mask: pygame.mask.Mask,
+                  x: float, y: float) -> np.ndarray:
+        """
+        Keep only the asteroids whose opaque pixels overlap mask placed at (x, y).
+        
+        Meant for the few asteroids that already passed the rect test.
+        """
+        store = self.asteroids
+        sprites = self.sprites
+        left = int(x)
+        top = int(y)
+        hits = []
+        for i in indices.tolist():
+            asteroid_mask, dx, dy = sprites.collision_mask(int(store.variant[i]),
+                                                           float(store.angle[i]))
+            offset = (int(store.x[i]) - dx - left, int(store.y[i]) - dy - top)
+            if mask.overlap(asteroid_mask, offset) is not None:
+                hits.append(i)
+        return np.array(hits, dtype=np.intp)
+    
+    def submit(self, render_queue: RenderQueue, offset: Tuple[int, int] = (0, 0), alpha: float = 1.0):
+        """Queue all asteroids for drawing."""
+        store = self.asteroids
+        sprites = self.sprites
+        n = store.count
+        frame = sprites.frame(store.variant[:n], store.angle[:n])
+        prev_x = store.prev_x[:n]
+        prev_y = store.prev_y[:n]
+        left = offset[0] - sprites.offset_x[frame]
+        top = offset[1] - sprites.offset_y[frame]
+        xs = (prev_x + (store.x[:n] - prev_x) * alpha + left).astype(np.intp).tolist()
+        ys = (prev_y + (store.y[:n] - prev_y) * alpha + top).astype(np.intp).tolist()
+        render_queue.add_batch(sprites.surfaces, frame.tolist(), xs, ys)
+
+
+class ParticleSystem:
+    """
+    Fixed-capacity particle pool backed by NumPy arrays.
+    
+    Live particles occupy the first count slots of every array, so update()
+    integrates and expires them all in batched operations, compacting the
+    survivors to the front. emit() never grows the arrays: particles past
+    the capacity are dropped, which makes capacity a hard budget.
+    
+    Each particle is a small square in one of COLORS that fades out over its
+    lifetime. Every (color, fade) pair is pre-rendered, so particles are
+    queued as one batch. Rates are per reference tick (1/60 s), like AsteroidStore.
+    Emitted counts are multiplied by density to thin effects out.
+    """
+    
+    COLORS = (
+        (255, 240, 180), (255, 170, 60), (230, 90, 40), (150, 140, 130),
+        (120, 200, 255), (230, 245, 255),
+    )
+    EXPLOSION = (0, 1, 2, 3)
+    THRUSTER = (4, 5)
+    FADE_STEPS = 8
+    SIZE = 3
+    DRAG = 0.95
+    CAPACITY = 1024
+    
+    FIELDS = (
+        ('x', np.float64),
+        ('y', np.float64),
+        ('vx', np.float64),
+        ('vy', np.float64),
+        ('life', np.float64),
+        ('max_life', np.float64),
+        ('color', np.intp),
+    )
+    
+    def __init__(self, capacity: int = CAPACITY, rng: np.random.Generator = None):
+        self.capacity = capacity
+        self.count = 0
+        self.density = 1.0
+        self.rng = rng if rng is not None else np.random.default_rng()
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        
+        self.sprites: List[pygame.Surface] = []
+        for color in self.COLORS:
+            for step in range(self.FADE_STEPS):
+                sprite = pygame.Surface((self.SIZE, self.SIZE), pygame.SRCALPHA)
+                sprite.fill((*color, 255 * (step + 1) // self.FADE_STEPS))
+                self.sprites.append(sprite)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def clear(self):
+        """Remove all particles."""
+        self.count = 0
+    
+    def emit(self, x: float, y: float, count: float, speed: float, life: float,
+             colors: Sequence[int], direction: float = 0.0, spread: float = math.pi) -> int:
+        """
+        Launch up to count particles from (x, y) and return how many fit.
+        
+        Directions are within spread radians of direction (0 points right,
+        pi/2 down) and speeds and lifetimes vary up to the given maximums.
+        A fractional count is rounded up or down at random, so small per-tick
+        rates average out.
+        """
+        free = self.capacity - self.count
+        if free <= 0:
+            return 0
+        count = min(int(count * self.density + self.rng.random()), free)
+        if count <= 0:
+            return 0
+        
+        rng = self.rng
+        new = slice(self.count, self.count + count)
+        angle = direction + rng.uniform(-spread, spread, count)
+        velocity = speed * rng.uniform(0.3, 1.0, count)
+        self.x[new] = x
+        self.y[new] = y
+        self.vx[new] = np.cos(angle) * velocity
+        self.vy[new] = np.sin(angle) * velocity
+        self.life[new] = self.max_life[new] = life * rng.uniform(0.5, 1.0, count)
+        self.color[new] = rng.choice(colors, count)
+        self.count += count
+        return count
+    
+    def update(self, scale: float = 1.0):
+        """Advance every particle by scale reference ticks and drop expired ones."""
+        n = self.count
+        if n == 0:
+            return
+        
+        self.life[:n] -= scale
+        alive = self.life[:n] > 0
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            for name, _ in self.FIELDS:
+                array = getattr(self, name)
+                array[:len(keep)] = array[keep]
+            n = self.count = len(keep)
+        
+        drag = self.DRAG ** scale
+        self.vx[:n] *= drag
+        self.vy[:n] *= drag
+        self.x[:n] += self.vx[:n] * scale
+        self.y[:n] += self.vy[:n] * scale
+    
+    def submit(self, render_queue: RenderQueue, offset: Tuple[int, int] = (0, 0)):
+        """Queue all particles for drawing."""
+        n = self.count
+        if n == 0:
+            return
+        
+        fade = (self.life[:n] / self.max_life[:n] * self.FADE_STEPS).astype(np.intp)
+        sprite = self.color[:n] * self.FADE_STEPS + np.minimum(fade, self.FADE_STEPS - 1)
+        half = self.SIZE // 2
+        xs = (self.x[:n] + (offset[0] - half)).astype(np.intp).tolist()
+        ys = (self.y[:n] + (offset[1] - half)).astype(np.intp).tolist()
+        render_queue.add_batch(self.sprites, sprite.tolist(), xs, ys)
+
+
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+class FrameProfiler:
+    """
+    Per-phase frame timings kept in a fixed-size ring buffer.
+    
+    Phases are timed with time.perf_counter() and summed over a frame. Each
+    finished frame becomes one row of phase times, total frame time (both in
+    milliseconds) and entity counts, overwriting the oldest row when full.
+    Per-phase and frame time totals over the whole run are kept separately
+    in seconds.
+    """
+    
+    PHASES = ('events', 'player', 'bullets', 'enemies', 'collisions',
+              'asteroid_collisions', 'particles', 'draw', 'present')
+    COUNTERS = ('asteroids', 'bullets_live', 'particles')
+    COLUMNS = PHASES + ('frame',) + COUNTERS
+    
+    def __init__(self, capacity: int = 3600):
+        self.capacity = capacity
+        self.rows = np.zeros((capacity, len(self.COLUMNS)))
+        self.frames = 0
+        self.totals = np.zeros(len(self.PHASES))
+        self.frame_seconds = 0.0
+        self._phase_index = {name: i for i, name in enumerate(self.PHASES)}
+        self._current = np.zeros(len(self.PHASES))
+        self._frame_start = 0.0
+    
+    def begin_frame(self):
+        """Start timing a new frame."""
+        self._current[:] = 0.0
+        self._frame_start = time.perf_counter()
+    
+    def add(self, phase: str, start: float, end: float = None) -> float:
+        """Add the time since start to a phase and return the end timestamp."""
+        if end is None:
+            end = time.perf_counter()
+        self._current[self._phase_index[phase]] += end - start
+        return end
+    
+    def end_frame(self, *counts: int):
+        """Record the finished frame with the given entity counts."""
+        frame_time = time.perf_counter() - self._frame_start
+        phases = len(self.PHASES)
+        
+        row = self.rows[self.frames % self.capacity]
+        row[:phases] = self._current * 1000.0
+        row[phases] = frame_time * 1000.0
+        row[phases + 1:phases + 1 + len(counts)] = counts
+        
+        self.totals += self._current
+        self.frame_seconds += frame_time
+        self.frames += 1
+    
+    def total(self, *phases: str) -> float:
+        """Get the total seconds spent in phases over the whole run."""
+        return float(sum(self.totals[self._phase_index[phase]] for phase in phases))
+    
+    def recent(self) -> np.ndarray:
+        """Get the buffered rows, oldest first."""
+        if self.frames <= self.capacity:
+            return self.rows[:self.frames]
+        return np.roll(self.rows, -(self.frames % self.capacity), axis=0)
+    
+    def frame_percentiles(self, *percentiles: float, window: int = None) -> List[float]:
+        """Get frame time percentiles in milliseconds over the last window buffered frames."""
+        if self.frames == 0:
+            return [0.0] * len(percentiles)
+        buffered = min(self.frames, self.capacity)
+        window = buffered if window is None else min(window, buffered)
+        end = self.frames % self.capacity or buffered
+        # The window may wrap around the end of the ring
+        rows = np.arange(end - window, end) % self.capacity
+        frame_times = self.rows[rows, len(self.PHASES)]
+        return np.percentile(frame_times, percentiles).tolist()
+    
+    def export(self, path: str, metadata: Dict[str, float] = None):
+        """
+        Write the buffered frames as CSV, or JSON when path ends in .json.
+        
+        JSON traces also carry the optional run-level metadata.
+        """
+        rows = self.recent().tolist()
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'columns': list(self.COLUMNS), 'frames': rows,
+                           'metadata': metadata or {}}, f)
+        else:
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.COLUMNS)
+                writer.writerows(rows)
+
+
+class PerformanceGovernor:
+    """
+    Trades visual effects for frame time.
+    
+    Every CHECK_INTERVAL frames it takes the PERCENTILE frame time over the
+    last WINDOW frames. Above the frame budget it steps one quality level
+    down; below UPGRADE_RATIO of the budget for UPGRADE_CHECKS checks in a
+    row it steps one level back up. The gap between the two thresholds, the
+    run of checks needed to upgrade and waiting for a full window of frames
+    after every change keep it from oscillating between levels.
+    
+    Only cosmetic work is degraded. Gameplay such as the asteroid cap never
+    changes, so replays and scores do not depend on the machine.
+    """
+    
+    # Particle density, screen shake
+    LEVELS = (
+        (1.0, True),
+        (0.5, True),
+        (0.25, False),
+        (0.0, False),
+    )
+    WINDOW = 120
+    CHECK_INTERVAL = 30
+    PERCENTILE = 95
+    UPGRADE_RATIO = 0.6
+    UPGRADE_CHECKS = 4
+    
+    def __init__(self, game: 'Game', budget_ms: float):
+        self.game = game
+        self.budget_ms = budget_ms
+        self.level = 0
+        self._headroom_checks = 0
+        self._changed_at = 0
+    
+    def update(self):
+        """Look at the recent frame times after a frame and change level if needed."""
+        frames = self.game.profiler.frames
+        if frames % self.CHECK_INTERVAL or frames - self._changed_at < self.WINDOW:
+            return
+        
+        (frame_ms,) = self.game.profiler.frame_percentiles(self.PERCENTILE, window=self.WINDOW)
+        if frame_ms > self.budget_ms:
+            self._headroom_checks = 0
+            if self.level < len(self.LEVELS) - 1:
+                self.set_level(self.level + 1)
+        elif frame_ms < self.budget_ms * self.UPGRADE_RATIO:
+            self._headroom_checks += 1
+            if self._headroom_checks >= self.UPGRADE_CHECKS and self.level > 0:
+                self.set_level(self.level - 1)
+        else:
+            self._headroom_checks = 0
+    
+    def set_level(self, level: int):
+        """Apply a quality level, 0 being the highest."""
+        density, shake = self.LEVELS[level]
+        game = self.game
+        game.particles.density = density
+        game.shake_enabled = shake
+        self.level = level
+        self._headroom_checks = 0
+        self._changed_at = game.profiler.frames
+
+
+# ============================================================================
+# INPUT
+# ============================================================================
+
+class ScriptedKeys:
+    """
+    Key state for driving the game without a keyboard.
+    
+    Indexable by pygame key constants like pygame.key.get_pressed(), so it
+    can be passed anywhere the real key state is expected.
+    """
+    
+    def __init__(self, pressed: Iterable[int] = ()):
+        self.pressed = frozenset(pressed)
     
-    def get_active_asteroids(self) -> List[Asteroid]:
-        """Get all active asteroids."""
-        return self.asteroids
+    def __getitem__(self, key: int) -> bool:
+        return key in self.pressed
+
+
+class InputPipeline:
+    """
+    Turns SDL events into the key state each simulation tick sees.
+    
+    Only the event types the game handles are let into the SDL queue. Key
+    state is built from KEYDOWN/KEYUP events instead of being polled, and
+    presses of the gameplay keys stay latched until a tick consumes them, so
+    a press drained this frame is applied by this frame's ticks and a tap
+    shorter than a tick is never lost. Presses are only latched while a level
+    is being played, and a state change drops any that no tick consumed.
+    
+    pygame does not expose SDL's event timestamps, so presses are stamped
+    when drained. Once a tick has consumed a press, the next display update
+    records the press-to-photon latency in a ring buffer.
+    """
+    
+    ALLOWED_EVENTS = (
+        pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN,
+        pygame.MOUSEMOTION, pygame.WINDOWEXPOSED, pygame.WINDOWFOCUSLOST,
+    )
+    ACTION_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE)
+    LATENCY_SAMPLES = 256
+    
+    def __init__(self):
+        self.held = set()
+        self.latched = set()
+        self.latencies = np.zeros(self.LATENCY_SAMPLES)
+        self.samples = 0
+        self._pending: List[float] = []
+        self._unshown: List[float] = []
+        # Refilled in place by consume() so reading input allocates nothing
+        self._keys = ScriptedKeys()
+        self._keys.pressed = set()
+    
+    @classmethod
+    def filter_events(cls):
+        """Let only the event types the game handles into the SDL queue."""
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(cls.ALLOWED_EVENTS)
+    
+    def process(self, events: Iterable[pygame.event.Event], now: float, playing: bool = True):
+        """Update the key state from events drained at time now."""
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                self.held.add(event.key)
+                if playing and event.key in self.ACTION_KEYS:
+                    self.latched.add(event.key)
+                    self._pending.append(now)
+            elif event.type == pygame.KEYUP:
+                self.held.discard(event.key)
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                # Key releases while unfocused never arrive
+                self.held.clear()
+    
+    def consume(self) -> ScriptedKeys:
+        """
+        Get the key state for one tick and release the latched presses.
+        
+        The same object is refilled on every call, so it is only valid until
+        the next one.
+        """
+        keys = self._keys
+        keys.pressed.clear()
+        keys.pressed.update(self.held)
+        keys.pressed.update(self.latched)
+        self.latched.clear()
+        if self._pending:
+            self._unshown.extend(self._pending)
+            self._pending.clear()
+        return keys
+    
+    def drop_presses(self):
+        """Forget latched presses no tick has consumed yet."""
+        self.latched.clear()
+        self._pending.clear()
+    
+    def handled(self, stamp: float):
+        """Measure the latency of an input acted on outside the ticks, such as a click."""
+        self._unshown.append(stamp)
+    
+    def presented(self):
+        """Record the latency of every acted-on input the display now shows."""
+        if not self._unshown:
+            return
+        now = time.perf_counter()
+        for stamp in self._unshown:
+            self.latencies[self.samples % self.LATENCY_SAMPLES] = (now - stamp) * 1000.0
+            self.samples += 1
+        self._unshown.clear()
+    
+    def latency_percentiles(self, *percentiles: float) -> List[float]:
+        """Get input-to-photon latency percentiles in milliseconds over the buffered samples."""
+        if self.samples == 0:
+            return [0.0] * len(percentiles)
+        samples = self.latencies[:min(self.samples, self.LATENCY_SAMPLES)]
+        return np.percentile(samples, percentiles).tolist()
+
+
+class InputRecorder:
+    """
+    Records per-tick input bits as a compact run-length-encoded file.
+    
+    Each tick's input is packed into four bits (left, right, space, escape)
+    and consecutive identical ticks are stored as one run. The file holds a
+    header with the level seed, level, tick rate and the gameplay options
+    that change the simulation, followed by one byte of input bits and a
+    LEB128 run length per run.
+    """
+    
+    MAGIC = b'AARP'
+    VERSION = 2
+    HEADER = struct.Struct('<4sBQHHB')
+    
+    KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_ESCAPE)
+    
+    # Header flag bits
+    PRECISE_COLLISIONS = 0x01
+    
+    def __init__(self, seed: int, level: int, tick_rate: int,
+                 precise_collisions: bool = False):
+        self.seed = seed
+        self.level = level
+        self.tick_rate = tick_rate
+        self.precise_collisions = precise_collisions
+        self.runs: List[List[int]] = []
+    
+    @classmethod
+    def encode(cls, keys: Sequence[bool]) -> int:
+        """Pack the recorded keys of a key state into input bits."""
+        bits = 0
+        for i, key in enumerate(cls.KEYS):
+            if keys[key]:
+                bits |= 1 << i
+        return bits
+    
+    def record(self, keys: Sequence[bool]):
+        """Record the input for one tick."""
+        bits = self.encode(keys)
+        if self.runs and self.runs[-1][0] == bits:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([bits, 1])
+    
+    def save(self, path: str):
+        """Write the recording to path."""
+        flags = self.PRECISE_COLLISIONS if self.precise_collisions else 0
+        data = bytearray(self.HEADER.pack(self.MAGIC, self.VERSION, self.seed,
+                                          self.level, self.tick_rate, flags))
+        for bits, count in self.runs:
+            data.append(bits)
+            while True:
+                byte = count & 0x7F
+                count >>= 7
+                if count:
+                    data.append(byte | 0x80)
+                else:
+                    data.append(byte)
+                    break
+        with open(path, 'wb') as f:
+            f.write(data)
+    
+    @classmethod
+    def load(cls, path: str) -> 'InputRecorder':
+        """Read a recording written by save()."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        
+        if len(data) <= len(cls.MAGIC) or data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError(f"{path} is not an input recording")
+        version = data[len(cls.MAGIC)]
+        if version != cls.VERSION:
+            raise ValueError(f"{path} is a version {version} recording; "
+                             f"this build only replays version {cls.VERSION}")
+        if len(data) < cls.HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        
+        _, _, seed, level, tick_rate, flags = cls.HEADER.unpack_from(data)
+        recording = cls(seed, level, tick_rate,
+                        precise_collisions=bool(flags & cls.PRECISE_COLLISIONS))
+        i = cls.HEADER.size
+        while i < len(data):
+            bits = data[i]
+            i += 1
+            count = shift = 0
+            while True:
+                if i >= len(data):
+                    raise ValueError(f"{path} is truncated")
+                byte = data[i]
+                i += 1
+                count |= (byte & 0x7F) << shift
+                shift += 7
+                if not byte & 0x80:
+                    break
+            recording.runs.append([bits, count])
+        return recording
+    
+    def replay(self, game: 'Game') -> int:
+        """
+        Start the recorded level on game and feed it every recorded tick.
+        
+        Runs through Game.step with no frame pacing and returns the number
+        of ticks simulated.
+        """
+        keys = [
+            ScriptedKeys(key for i, key in enumerate(self.KEYS) if bits & (1 << i))
+            for bits in range(1 << len(self.KEYS))
+        ]
+        
+        game.start_level(self.level, seed=self.seed)
+        ran = 0
+        start = time.perf_counter()
+        for bits, count in self.runs:
+            ran += game.step(keys[bits], count)
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            game.ticks_per_second = ran / elapsed
+        return ran
+
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+
+@dataclass
+class Session:
+    """Stats of one finished game."""
+    started_at: float
+    duration: float
+    score: int
+    asteroids_destroyed: int
+    avg_frame_ms: float
+    seed: int = None
+
+
+class ScoreStore:
+    """
+    Leaderboard and session stats kept in a SQLite database.
+    
+    Every finished game is one row of the sessions table, so the leaderboard
+    is its highest scores. A background thread owns the writing connection:
+    record() only queues the session, and the thread commits whatever has
+    queued up as one transaction. The database runs in WAL mode, so a crash
+    mid-write rolls back to the last committed game instead of corrupting
+    or clearing the stored records, and readers never wait on the writer.
+    
+    The database lives next to this module. A high score left in the old
+    file.txt, which the game used to write in the working directory, is
+    imported the first time the database is created. If the database cannot
+    be opened or written the game keeps running, and the first failure is
+    reported as a warning.
+    """
+    
+    PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scores.db')
+    LEGACY_PATHS = ('file.txt', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'file.txt'))
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            started_at REAL NOT NULL,
+            duration REAL NOT NULL,
+            score INTEGER NOT NULL,
+            asteroids_destroyed INTEGER NOT NULL,
+            avg_frame_ms REAL NOT NULL,
+            seed INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS sessions_by_score ON sessions (score DESC);
+    """
+    INSERT = ("INSERT INTO sessions (started_at, duration, score, asteroids_destroyed, "
+              "avg_frame_ms, seed) VALUES (?, ?, ?, ?, ?, ?)")
+    
+    def __init__(self, path: str = PATH):
+        self.path = path
+        self._queue: queue.Queue = queue.Queue()
+        self._best: Future = Future()
+        self._warned = False
+        self._thread = threading.Thread(target=self._write_loop, name='score-writer', daemon=True)
+        self._thread.start()
+    
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+    
+    def _open(self) -> sqlite3.Connection:
+        """Connect, create the schema and import the legacy high score."""
+        connection = self._connect()
+        with connection:
+            connection.executescript(self.SCHEMA)
+            if connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0:
+                legacy = 0
+                for path in self.LEGACY_PATHS:
+                    try:
+                        with open(path) as f:
+                            legacy = int(f.read())
+                        break
+                    except (OSError, ValueError):
+                        pass
+                if legacy > 0:
+                    connection.execute(self.INSERT, (time.time(), 0.0, legacy, 0, 0.0, None))
+        return connection
+    
+    def _warn(self, action: str, error: sqlite3.Error):
+        """Report the first database failure; later ones would only repeat it."""
+        if not self._warned:
+            self._warned = True
+            warnings.warn(f"Could not {action} the score database {self.path}: {error}; "
+                          f"scores will not be saved", RuntimeWarning)
+    
+    def _write_loop(self):
+        try:
+            connection = self._open()
+            best = connection.execute("SELECT MAX(score) FROM sessions").fetchone()[0]
+        except sqlite3.Error as e:
+            # Without a database the game still runs, it just forgets
+            self._warn('open', e)
+            self._best.set_result(0)
+            while self._queue.get() is not None:
+                pass
+            return
+        self._best.set_result(best or 0)
+        
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            running = None not in batch
+            rows = [
+                (s.started_at, s.duration, s.score, s.asteroids_destroyed, s.avg_frame_ms, s.seed)
+                for s in batch if s is not None
+            ]
+            try:
+                with connection:
+                    connection.executemany(self.INSERT, rows)
+            except sqlite3.Error as e:
+                self._warn('write to', e)
+        connection.close()
+    
+    def best(self) -> int:
+        """Get the highest stored score, waiting for the database to open."""
+        return self._best.result()
+    
+    def record(self, session: Session):
+        """Queue a finished game for writing without blocking."""
+        self._queue.put(session)
+    
+    def leaderboard(self, limit: int = 10) -> List[Session]:
+        """Get the highest scoring sessions, best first."""
+        # The writer creates the schema before publishing the best score
+        self._best.result()
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT started_at, duration, score, asteroids_destroyed, avg_frame_ms, seed "
+                "FROM sessions ORDER BY score DESC, id LIMIT ?", (limit,)
+            ).fetchall()
+        finally:
+            connection.close()
+        return [Session(*row) for row in rows]
+    
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
 
 
 # ============================================================================
@@ -276,17 +1891,68 @@ class Game:
     - Coordinates all entities (player, asteroids, bullets)
     - Handles collisions and score
     - Manages game state and difficulty
+    
+    A simulation_only game is headless and can only be stepped, skipping the
+    display mode, fonts, backgrounds, music and sound effects. Games that
+    run side by side can share one sprite_cache and asteroid_sprites instead
+    of each decoding and rotating the same images.
     """
     
     SCREEN_WIDTH = 800
     SCREEN_HEIGHT = 600
     FPS = 60
+    REFERENCE_TICK_RATE = 60  # gameplay speeds are tuned per tick at this rate
+    MAX_FRAME_TIME = 0.25
+    MAX_TICKS_PER_FRAME = 5
     
-    def __init__(self):
+    IDLE_TIMEOUT_MS = 250
+    PLAYER_START = (370, 480)
+    BACKGROUNDS = (
+        'images/background1.png',
+        'images/background2.png',
+        'images/background3.png',
+        'images/background4.png',
+        'images/background5.png',
+        'images/background6.png',
+    )
+    LIVES_X = [680, 720, 760]
+    
+    # Particles per asteroid hit, per landed asteroid and per reference tick
+    EXPLOSION_PARTICLES = 24
+    LANDING_PARTICLES = 16
+    THRUSTER_PARTICLES = 2
+    
+    def __init__(self, headless: bool = False, dirty_rects: bool = False,
+                 tick_rate: int = REFERENCE_TICK_RATE, render_fps: int = FPS,
+                 seed: int = None, precise_collisions: bool = False,
+                 asteroid_frames: int = AsteroidSprites.FRAME_COUNT,
+                 sprite_budget: int = AsteroidSprites.BUDGET,
+                 simulation_only: bool = False, sprite_cache: SpriteCache = None,
+                 asteroid_sprites: AsteroidSprites = None):
+        self._start_time = time.perf_counter()
+        self.time_to_first_frame = None
+        headless = headless or simulation_only
+        self.headless = headless
+        self.simulation_only = simulation_only
+        self.precise_collisions = precise_collisions
+        self.tick_rate = tick_rate
+        self.tick_dt = 1.0 / tick_rate
+        self.tick_scale = self.REFERENCE_TICK_RATE / tick_rate
+        self.render_fps = render_fps
+        if headless:
+            # SDL dummy drivers need no display or audio device
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        
         pygame.init()
         
-        self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
-        pygame.display.set_caption('Asteroid Attack')
+        if simulation_only:
+            self.screen = None
+        else:
+            self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
+            pygame.display.set_caption('Asteroid Attack')
+            InputPipeline.filter_events()
+        self.input = InputPipeline()
         
         self.clock = pygame.time.Clock()
         self.running = True
@@ -297,197 +1963,457 @@ class Game:
         
         # Game state
         self.score = 0
-        self.high_score = self._load_high_score()
+        self.scores = None if headless else ScoreStore()
+        self.high_score = self.scores.best() if self.scores is not None else 0
+        self.asteroids_destroyed = 0
+        self.session_ticks = 0
+        self._session_start = (0.0, 0, 0.0)
         self.lives = 3
         self.screen_shake = 0
-        self.click = False
+        self.ticks_per_second = 0.0
+        self.profiler = FrameProfiler()
+        
+        # Randomness: each level gets its own gameplay stream, drawn from a
+        # per-game seed source, while cosmetic effects use a separate stream
+        # so rendering never changes the simulation
+        self._seed_source = np.random.default_rng(seed)
+        self.level_seed = None
+        self.effects_rng = random.Random(seed)
+        # Particles are purely visual, so headless games get no budget
+        self.particles = ParticleSystem(0 if headless else ParticleSystem.CAPACITY,
+                                        np.random.default_rng(seed))
+        self.record_path = None
+        self.recorder = None
+        self.show_profiler = False
+        self.trace_path = None
         
         # Assets
+        if sprite_cache is None:
+            sprite_cache = SpriteCache(Assets())
+        self.assets = sprite_cache.assets
+        self.sprite_cache = sprite_cache
         self._load_assets()
         
         # Entities
-        self.player = Player(370, 480, self.player_img)
-        self.bullet = Bullet(370, 480, self.projectile_img)
-        self.enemy_manager = EnemyManager()
+        self.player = Player(*self.PLAYER_START, self.player_img)
+        self.bullets = BulletPool(self.projectile_img)
+        self.shot_limit = 1
+        self.enemy_manager = EnemyManager(self.sprite_cache, frame_count=asteroid_frames,
+                                          sprite_budget=sprite_budget, sprites=asteroid_sprites)
+        
+        # Steps quality down on slow machines; only the real-time loop drives it
+        self.shake_enabled = True
+        self.governor = PerformanceGovernor(self, 1000.0 / (render_fps or self.FPS))
         
         # UI
-        self.font = pygame.font.Font('./assets/fonts/Rajdhani-Medium.ttf', 32)
-        self.score_font = pygame.font.Font('./assets/fonts/Rajdhani-Medium.ttf', 42)
-        self.menu_font = pygame.font.Font('./assets/fonts/Poppins-BlackItalic.ttf', 50)
-        self.menu_font_2 = pygame.font.Font('./assets/fonts/Poppins-MediumItalic.ttf', 42)
-        self.menu_font_3 = pygame.font.Font('./assets/fonts/Poppins-Regular.ttf', 36)
-        self.over_font = pygame.font.Font('./assets/fonts/Rajdhani-Medium.ttf', 64)
+        if not simulation_only:
+            self._load_fonts()
+            self.overlay = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.SRCALPHA)
+        self._profiler_surface = None
+        self.play_btn = pygame.Rect(300, 300, 200, 50)
+        self.quit_btn = pygame.Rect(300, 380, 200, 50)
+        self.text_cache = TextCache()
+        self._frames: Dict[str, Tuple[Hashable, pygame.Surface]] = {}
         
-        self.overlay = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.SRCALPHA)
+        # Rendering
+        self.dirty_rects = DirtyRectTracker() if dirty_rects else None
+        self.render_queue = RenderQueue()
+        self._last_bg_index = 0
+        self._last_shake = 0
+        self._hud_score = None
+        self._hud_lives = None
+        self._score_surface = None
+        self._score_rect = pygame.Rect(10, 10, 0, 0)
+        heart_w, heart_h = self.lives_img.get_size()
+        self._lives_rect = pygame.Rect(
+            self.LIVES_X[0], 12, self.LIVES_X[-1] + heart_w - self.LIVES_X[0], heart_h
+        )
         
         # Music
         self.music_playing = False
-        self._init_music()
+        if not simulation_only:
+            self._init_music()
+        
+        # Sound effects
+        self.sound_bank = SoundBank(self.assets, num_channels=0 if simulation_only else 8)
+        self.sound_bank.load('laser', 'music/laser.wav', 0.25)
+        self.sound_bank.load('explosion', 'music/explosion.wav')
+        self.sound_bank.load('game_over', 'music/game_over.wav')
     
     def _load_assets(self):
         """Load all game assets."""
-        icon = pygame.image.load('./assets/images/asteroid1.png')
-        pygame.display.set_icon(icon)
+        self.player_img = self.sprite_cache.get('images/spaceship3.png')
+        self.projectile_img = self.sprite_cache.get('images/projectile.png')
+        self.projectile_mask = self.sprite_cache.get_mask('images/projectile.png')
+        self.lives_img = self.sprite_cache.get('images/heart.png')
         
-        self.player_img = pygame.image.load('./assets/images/spaceship3.png')
-        self.projectile_img = pygame.image.load('./assets/images/projectile.png')
-        self.lives_img = pygame.image.load('./assets/images/heart.png')
+        self.backgrounds: List[LazySurface] = []
+        self._pending_backgrounds: List[LazySurface] = []
+        if self.simulation_only:
+            return
         
+        icon = self.sprite_cache.get('images/asteroid1.png')
+        pygame.display.set_icon(icon)
+        
+        # Full-screen backgrounds are opaque, so skip per-pixel alpha. Only the
+        # menu background is needed for the first frame; gameplay backgrounds
+        # decode in the background, in the order they are unlocked. Headless
+        # games may never draw, so they wait for their first gameplay frame
+        self.menu_bg = self.sprite_cache.get('images/menu_bg.png', alpha=False)
+        if not self.headless:
+            self._load_backgrounds()
+    
+    def _load_backgrounds(self):
+        """Start decoding the gameplay backgrounds on the loader thread."""
         self.backgrounds = [
-            pygame.image.load('./assets/images/background1.png'),
-            pygame.image.load('./assets/images/background2.png'),
-            pygame.image.load('./assets/images/background3.png'),
-            pygame.image.load('./assets/images/background4.png'),
-            pygame.image.load('./assets/images/background5.png'),
-            pygame.image.load('./assets/images/background6.png'),
+            self.sprite_cache.load_async(name, alpha=False) for name in self.BACKGROUNDS
         ]
+        self._pending_backgrounds = list(self.backgrounds)
+    
+    def _load_fonts(self):
+        """Load the fonts for the HUD, menus and profiler overlay."""
+        self.font = self.assets.font('fonts/Rajdhani-Medium.ttf', 32)
+        self.score_font = self.assets.font('fonts/Rajdhani-Medium.ttf', 42)
+        self.menu_font = self.assets.font('fonts/Poppins-BlackItalic.ttf', 50)
+        self.menu_font_2 = self.assets.font('fonts/Poppins-MediumItalic.ttf', 42)
+        self.menu_font_3 = self.assets.font('fonts/Poppins-Regular.ttf', 36)
+        self.over_font = self.assets.font('fonts/Rajdhani-Medium.ttf', 64)
         
-        self.menu_bg = pygame.image.load('./assets/images/menu_bg.png')
+        self.profiler_font = self.assets.font('fonts/Rajdhani-Medium.ttf', 20)
+    
+    def _poll_backgrounds(self):
+        """Convert any backgrounds the loader thread finished decoding."""
+        if self._pending_backgrounds:
+            self._pending_backgrounds = [
+                background for background in self._pending_backgrounds if not background.poll()
+            ]
+            if not self._pending_backgrounds:
+                # Nothing else is loaded asynchronously
+                self.sprite_cache.close()
     
     def _init_music(self):
         """Initialize background music."""
         try:
             pygame.mixer.init()
-            mixer.music.load('./assets/music/background.wav')
+            mixer.music.load(self.assets.open('music/background.wav'), 'background.wav')
             mixer.music.set_volume(0.5)
         except Exception:
             pass
     
-    def _load_high_score(self) -> int:
-        """Load high score from file."""
-        try:
-            with open('file.txt', 'r') as f:
-                return int(f.read())
-        except (ValueError, FileNotFoundError):
-            return 0
-    
-    def _save_high_score(self):
-        """Save high score to file."""
-        if self.score > self.high_score:
-            self.high_score = self.score
-        try:
-            with open('file.txt', 'w') as f:
-                f.write(str(self.high_score))
-        except:
-            pass
-    
-    def _play_sound(self, sound_path: str, volume: float = 0.7):
-        """Play a sound effect."""
-        try:
-            sound = mixer.Sound(sound_path)
-            sound.set_volume(volume)
-            sound.play()
-        except:
-            pass
+    def _end_session(self):
+        """Update the high score and queue the finished game's stats for saving."""
+        self.high_score = max(self.high_score, self.score)
+        if self.scores is None:
+            return
+        
+        started_at, frames, frame_seconds = self._session_start
+        frames = self.profiler.frames - frames
+        avg_frame_ms = (self.profiler.frame_seconds - frame_seconds) / frames * 1000.0 if frames else 0.0
+        self.scores.record(Session(
+            started_at=started_at,
+            duration=self.session_ticks * self.tick_dt,
+            score=self.score,
+            asteroids_destroyed=self.asteroids_destroyed,
+            avg_frame_ms=avg_frame_ms,
+            seed=self.level_seed,
+        ))
     
     def _check_collisions(self):
         """Check bullet-asteroid collisions."""
-        if not self.bullet.active:
-            return
-        
-        bullet_rect = self.bullet.get_rect()
+        bullets = self.bullets.active
         
-        for asteroid in self.enemy_manager.get_active_asteroids():
-            asteroid_rect = asteroid.get_rect()
-            if bullet_rect.colliderect(asteroid_rect):
-                self._play_sound('./assets/music/explosion.wav')
-                self.bullet.active = False
-                self.score += 1
+        # Walk backwards so releasing a bullet never skips one
+        for i in range(len(bullets) - 1, -1, -1):
+            bullet = bullets[i]
+            hits = self.enemy_manager.query_rect(bullet.get_rect(), queries=i + 1)
+            # Cheap rect test first, pixel masks only for the rect hits
+            if len(hits) and self.precise_collisions:
+                hits = self.enemy_manager.mask_hits(
+                    hits, self.projectile_mask, bullet.pos.x, bullet.pos.y
+                )
+            if len(hits):
+                for _ in hits:
+                    self.sound_bank.play('explosion')
+                self._explode(hits, self.EXPLOSION_PARTICLES, direction=0.0, spread=math.pi)
+                self.bullets.release(bullet)
+                self.score += len(hits)
+                self.asteroids_destroyed += len(hits)
                 
-                # Respawn asteroid
-                asteroid.pos.x = random.randint(0, 765)
-                asteroid.pos.y = random.randint(0, 50)
+                # Respawn asteroids
+                self.enemy_manager.respawn(hits)
     
     def _check_asteroid_collisions(self):
         """Check if asteroids hit bottom of screen."""
-        for asteroid in self.enemy_manager.get_active_asteroids():
-            if asteroid.pos.y > 500:
-                self.screen_shake = 30
-                asteroid.pos.x = random.randint(0, 765)
-                asteroid.pos.y = random.randint(0, 50)
-                self.lives -= 1
-                
-                if self.lives <= 0:
-                    self.state_manager.transition(GameState.GAME_OVER)
+        asteroids = self.enemy_manager.asteroids
+        
+        landed = np.flatnonzero(asteroids.y[:asteroids.count] > 500)
+        if len(landed):
+            self.screen_shake = 30
+            # Debris kicks up from the ground
+            self._explode(landed, self.LANDING_PARTICLES, direction=-math.pi / 2, spread=1.2)
+            self.enemy_manager.respawn(landed)
+            self.lives -= len(landed)
+            
+            if self.lives <= 0:
+                self.sound_bank.play('game_over')
+                self.state_manager.transition(GameState.GAME_OVER)
+                self.input.drop_presses()
+                self._end_session()
+                self._save_recording()
+    
+    def _explode(self, indices: np.ndarray, count: int, direction: float, spread: float):
+        """Burst debris particles from the centres of the given asteroids."""
+        asteroids = self.enemy_manager.asteroids
+        centre_x = asteroids.x[indices] + asteroids.width[indices] * 0.5
+        centre_y = asteroids.y[indices] + asteroids.height[indices] * 0.5
+        for x, y in zip(centre_x.tolist(), centre_y.tolist()):
+            self.particles.emit(x, y, count, 4.0, 40, ParticleSystem.EXPLOSION, direction, spread)
+    
+    def _save_recording(self):
+        """Write the current input recording, if any, to record_path."""
+        if self.recorder is not None:
+            self.recorder.save(self.record_path)
     
-    def _update(self):
+    def _update(self, keys: Sequence[bool] = None):
         """Update game logic."""
-        keys = pygame.key.get_pressed()
+        profiler = self.profiler
+        start = time.perf_counter()
+        
+        self.session_ticks += 1
+        if keys is None:
+            keys = self.input.consume()
+        if self.recorder is not None:
+            self.recorder.record(keys)
         self.player.handle_input(keys)
-        self.player.update()
+        self.player.update(self.tick_scale)
+        start = profiler.add('player', start)
         
-        self.bullet.update()
+        self.bullets.update(self.tick_scale)
+        start = profiler.add('bullets', start)
         
         self.enemy_manager.update(
             self.difficulty_scaler,
             self.player.pos,
-            self.score
+            self.score,
+            self.tick_scale
         )
+        start = profiler.add('enemies', start)
         
         # Handle shooting
-        if keys[pygame.K_SPACE] and not self.bullet.active:
-            self._play_sound('./assets/music/laser.wav', 0.25)
-            self.bullet.fire(self.player.pos.x, self.player.pos.y)
+        if keys[pygame.K_SPACE] and len(self.bullets) < self.shot_limit:
+            if self.bullets.fire(self.player.pos.x, self.player.pos.y):
+                self.sound_bank.play('laser')
+        start = profiler.add('bullets', start)
         
         self._check_collisions()
+        start = profiler.add('collisions', start)
         self._check_asteroid_collisions()
+        start = profiler.add('asteroid_collisions', start)
+        
+        # Thruster trail from the bottom of the ship
+        player = self.player
+        self.particles.emit(player.pos.x + player.width / 2, player.pos.y + player.height - 6,
+                            self.THRUSTER_PARTICLES * self.tick_scale, 1.5, 18,
+                            ParticleSystem.THRUSTER, math.pi / 2, 0.35)
+        self.particles.update(self.tick_scale)
+        profiler.add('particles', start)
         
-        self.difficulty_scaler.update(1.0 / self.FPS)
+        self.difficulty_scaler.update(self.tick_dt)
         
         # Screen shake
         if self.screen_shake > 0:
-            self.screen_shake -= 1
+            self.screen_shake = max(self.screen_shake - self.tick_scale, 0)
     
-    def _draw(self):
-        """Draw game elements."""
-        self.screen.fill((0, 0, 0))
+    def _draw(self, alpha: float = 1.0):
+        """Draw game elements, interpolating entities alpha of the way into the last tick."""
+        draw_start = time.perf_counter()
         
         # Apply screen shake offset
         offset = (0, 0)
-        if self.screen_shake > 0:
-            offset = (random.randint(-4, 4), random.randint(-4, 4))
+        shake = self.screen_shake if self.shake_enabled else 0
+        if shake > 0:
+            offset = (self.effects_rng.randint(-4, 4), self.effects_rng.randint(-4, 4))
         
-        # Draw background
+        if not self.backgrounds:
+            self._load_backgrounds()
         bg_index = min(self.score // 10, len(self.backgrounds) - 1)
-        self.screen.blit(self.backgrounds[bg_index], (offset[0], offset[1]))
+        background = self.backgrounds[bg_index].get()
         
-        # Draw entities
-        self.player.draw(self.screen, offset)
+        # Shaking or a new background touches every pixel
+        dirty = self.dirty_rects
+        if dirty is not None and (
+            shake > 0 or self._last_shake > 0 or bg_index != self._last_bg_index
+        ):
+            dirty.invalidate()
+        self._last_shake = shake
+        self._last_bg_index = bg_index
+        
+        score_changed = self.score != self._hud_score
+        lives_changed = self.lives != self._hud_lives
+        
+        # Draw background
+        if dirty is None or dirty.full_redraw:
+            self.screen.fill((0, 0, 0))
+            self.screen.blit(background, (offset[0], offset[1]))
+        else:
+            dirty.erase(self.screen, background)
+            # The HUD blends over itself, so always redraw it from a clean
+            # background but only push it when its contents changed
+            self.screen.blit(background, self._score_rect, self._score_rect)
+            self.screen.blit(background, self._lives_rect, self._lives_rect)
+            if score_changed:
+                dirty.add(self._score_rect)
+            if lives_changed:
+                dirty.add(self._lives_rect)
         
-        if self.bullet.active:
-            self.bullet.draw(self.screen, offset)
+        rects = dirty.current if dirty is not None else None
         
-        for asteroid in self.enemy_manager.get_active_asteroids():
-            asteroid.draw(self.screen, offset)
+        # Draw entities in one batch
+        render_queue = self.render_queue
+        self.player.submit(render_queue, offset, alpha)
+        self.bullets.submit(render_queue, offset, alpha)
+        self.enemy_manager.submit(render_queue, offset, alpha)
+        self.particles.submit(render_queue, offset)
+        render_queue.flush(self.screen, rects)
         
         # Draw UI
-        score_text = self.font.render(f"Score: {self.score}", True, (255, 255, 255))
-        self.screen.blit(score_text, (10, 10))
+        if score_changed:
+            self._score_surface = self.text_cache.render(
+                self.font, f"Score: {self.score}", (255, 255, 255)
+            )
+        self._score_rect = self.screen.blit(self._score_surface, (10, 10))
+        if dirty is not None and score_changed:
+            dirty.add(self._score_rect)
         
         # Draw lives
-        lives_x = [680, 720, 760]
         for i in range(self.lives):
-            self.screen.blit(self.lives_img, (lives_x[i], 12))
+            self.screen.blit(self.lives_img, (self.LIVES_X[i], 12))
         
-        pygame.display.update()
+        self._hud_score = self.score
+        self._hud_lives = self.lives
+        
+        if self.show_profiler:
+            overlay_rect = self._draw_profiler_overlay()
+            if rects is not None:
+                rects.append(overlay_rect)
+        
+        present_start = self.profiler.add('draw', draw_start)
+        if dirty is not None:
+            dirty.present()
+        else:
+            pygame.display.update()
+        self.input.presented()
+        self.profiler.add('present', present_start)
+    
+    def _first_frame_ms(self) -> float:
+        """Get the startup time until the first frame was shown, in milliseconds."""
+        if self.time_to_first_frame is None:
+            return 0.0
+        return self.time_to_first_frame * 1000.0
     
-    def start_level(self, level: int):
-        """Start a specific level."""
+    def _draw_profiler_overlay(self) -> pygame.Rect:
+        """Draw FPS, frame time percentiles and entity counts, refreshed every 15 frames."""
+        if self._profiler_surface is None or self.profiler.frames % 15 == 0:
+            p50, p99 = self.profiler.frame_percentiles(50, 99)
+            input_p50, input_p99 = self.input.latency_percentiles(50, 99)
+            lines = [
+                f"FPS {self.clock.get_fps():.0f}",
+                f"frame p50 {p50:.2f} ms  p99 {p99:.2f} ms",
+                f"asteroids {len(self.enemy_manager.asteroids)}  bullets {len(self.bullets)}  "
+                f"particles {len(self.particles)}",
+                f"input p50 {input_p50:.1f} ms  p99 {input_p99:.1f} ms",
+                f"first frame {self._first_frame_ms():.0f} ms",
+            ]
+            if self.governor is not None:
+                lines.append(f"quality level {self.governor.level}")
+            line_height = self.profiler_font.get_linesize()
+            rendered = [self.profiler_font.render(line, True, (120, 255, 120)) for line in lines]
+            width = max(text.get_width() for text in rendered) + 12
+            
+            # Opaque, so redrawing it every frame never blends over itself
+            self._profiler_surface = pygame.Surface((width, line_height * len(lines) + 8))
+            for i, text in enumerate(rendered):
+                self._profiler_surface.blit(text, (6, 4 + i * line_height))
+        
+        return self.screen.blit(self._profiler_surface, (10, 50))
+    
+    def start_level(self, level: int, seed: int = None):
+        """
+        Start a specific level.
+        
+        The level's gameplay randomness comes from seed, or from the game's
+        seed source if none is given, so a level can be reproduced exactly.
+        """
+        if seed is None:
+            seed = int(self._seed_source.integers(2 ** 63))
+        self.level_seed = seed
+        self.enemy_manager.seed(np.random.default_rng(seed))
+        
         self.score = 0
         self.lives = 3
         self.screen_shake = 0
+        self.asteroids_destroyed = 0
+        self.session_ticks = 0
+        self._session_start = (time.time(), self.profiler.frames, self.profiler.frame_seconds)
         self.difficulty_scaler.reset()
+        self.bullets.clear()
+        self.particles.clear()
+        self.input.drop_presses()
+        self.player.pos.x = self.PLAYER_START[0]
+        self.player.save_position()
+        self.player.sync_rect()
+        
+        if self.record_path:
+            self.recorder = InputRecorder(seed, level, self.tick_rate,
+                                          precise_collisions=self.precise_collisions)
         
         num_asteroids = level
         self.enemy_manager.initialize_level(num_asteroids)
         
         self.state_manager.transition(GameState.PLAYING)
-        mixer.music.play(-1)
-        self.music_playing = True
+        self._play_music()
+    
+    def _play_music(self):
+        """Start the music loop if any music could be loaded."""
+        try:
+            mixer.music.play(-1)
+            self.music_playing = True
+        except pygame.error:
+            self.music_playing = False
+    
+    def step(self, inputs: Sequence[bool] = None, ticks: int = 1) -> int:
+        """
+        Advance the simulation by a number of ticks without drawing.
+        
+        Runs _update as fast as possible with no frame pacing, stopping early
+        if the game leaves the PLAYING state. Each tick is recorded as one
+        profiler frame. Returns the number of ticks run and records the
+        achieved rate in ticks_per_second.
+        """
+        if inputs is None:
+            inputs = ScriptedKeys()
+        
+        start = time.perf_counter()
+        ran = 0
+        while ran < ticks and self.state_manager.is_playing():
+            self.profiler.begin_frame()
+            self._update(inputs)
+            self.profiler.end_frame(len(self.enemy_manager.asteroids), len(self.bullets),
+                                       len(self.particles))
+            ran += 1
+        
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            self.ticks_per_second = ran / elapsed
+        return ran
     
-    def handle_events(self):
-        """Handle input events."""
-        for event in pygame.event.get():
+    def handle_events(self, events: List[pygame.event.Event] = None):
+        """Handle input events, draining the event queue unless events are given."""
+        if events is None:
+            events = pygame.event.get()
+        now = time.perf_counter()
+        self.input.process(events, now, self.state_manager.is_playing())
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
                 return
@@ -496,121 +2422,332 @@ class Game:
                 if event.key == pygame.K_ESCAPE:
                     if self.state_manager.current_state == GameState.PLAYING:
                         self.state_manager.transition(GameState.PAUSED)
+                        self.input.drop_presses()
                     elif self.state_manager.current_state == GameState.PAUSED:
                         self.state_manager.transition(GameState.PLAYING)
+                        self.input.drop_presses()
+                
+                if event.key == pygame.K_F3:
+                    self.show_profiler = not self.show_profiler
+                    if self.dirty_rects is not None:
+                        self.dirty_rects.invalidate()
                 
                 if event.key == pygame.K_m:
                     if self.music_playing:
                         mixer.music.stop()
                         self.music_playing = False
                     else:
-                        mixer.music.play(-1)
-                        self.music_playing = True
+                        self._play_music()
                 
                 if event.key == pygame.K_e and self.state_manager.current_state == GameState.GAME_OVER:
                     self.state_manager.transition(GameState.MENU)
 
                 if event.key == pygame.K_ESCAPE and self.state_manager.current_state == GameState.GAME_OVER:
-                    self._save_high_score()
                     self.state_manager.transition(GameState.MENU)    
             
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:
-                    self.click = True
+            # Menu buttons act on the click itself, not on the next menu redraw
+            if (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1
+                    and self.state_manager.current_state == GameState.MENU):
+                if self.play_btn.collidepoint(event.pos):
+                    self.start_level(1)
+                    self.input.handled(now)
+                elif self.quit_btn.collidepoint(event.pos):
+                    self.running = False
+                    return
+    
+    def _wait_for_events(self) -> List[pygame.event.Event]:
+        """Block until input arrives or the idle timeout passes."""
+        event = pygame.event.wait(self.IDLE_TIMEOUT_MS)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+    
+    def _idle_frame_key(self) -> Hashable:
+        """Get what the current non-playing screen depends on besides input."""
+        state = self.state_manager.current_state
+        if state == GameState.MENU:
+            mouse = pygame.mouse.get_pos()
+            return state, self.play_btn.collidepoint(mouse), self.quit_btn.collidepoint(mouse)
+        return state
     
     def run(self):
-        """Main game loop."""
+        """
+        Main game loop.
+        
+        Gameplay runs on a fixed timestep: real frame time from the clock is
+        accumulated and consumed in tick_dt steps, and rendering interpolates
+        between the last two ticks. Frame time is clamped and ticks per frame
+        are capped so a slow machine drops time instead of spiralling.
+        
+        The menu, pause and game over screens instead block on the event queue
+        and only redraw after input other than plain mouse motion, or when the
+        hovered button changes. The clock is ticked in exactly one place.
+        """
+        idle_key = None
+        was_playing = False
+        accumulator = 0.0
+        frame_time = 0.0
+        
+        # Assets and systems live for the whole run; moving them out of the
+        # collector's generations keeps any collection during play short
+        gc.collect()
+        gc.freeze()
+        
         while self.running:
-            self.handle_events()
+            began = self.state_manager.is_playing()
+            if began:
+                self.profiler.begin_frame()
+                events_start = time.perf_counter()
+                events = pygame.event.get()
+            elif idle_key is None:
+                # Nothing drawn for this screen yet, so do not wait for input
+                events = pygame.event.get()
+                events_start = time.perf_counter()
+            else:
+                events = self._wait_for_events()
+                events_start = time.perf_counter()
+            self.handle_events(events)
+            self.profiler.add('events', events_start)
+            if not self.running:
+                break
             
             state = self.state_manager.current_state
             
-            if state == GameState.MENU:
-                self._draw_menu()
-            elif state == GameState.PLAYING:
-                self._update()
-                self._draw()
-            elif state == GameState.PAUSED:
-                self._draw_pause_menu()
-            elif state == GameState.GAME_OVER:
-                self._draw_game_over()
+            if state == GameState.PLAYING:
+                # A level started or resumed by these events starts its first
+                # frame here, so the wait before it is not timed as a frame
+                if not began:
+                    self.profiler.begin_frame()
+                # Time spent in menus does not count towards gameplay
+                if not was_playing:
+                    accumulator = 0.0
+                    frame_time = self.tick_dt
+                was_playing = True
+                
+                accumulator += min(frame_time, self.MAX_FRAME_TIME)
+                ticks = 0
+                while accumulator >= self.tick_dt and self.state_manager.is_playing():
+                    self._update()
+                    accumulator -= self.tick_dt
+                    ticks += 1
+                    if ticks == self.MAX_TICKS_PER_FRAME:
+                        accumulator = 0.0
+                
+                self._draw(accumulator / self.tick_dt)
+                self.profiler.end_frame(len(self.enemy_manager.asteroids), len(self.bullets),
+                                        len(self.particles))
+                if self.governor is not None:
+                    self.governor.update()
+                idle_key = None
+            else:
+                was_playing = False
+                key = self._idle_frame_key()
+                has_input = any(event.type != pygame.MOUSEMOTION for event in events)
+                if key != idle_key or has_input:
+                    idle_key = key
+                    if state == GameState.MENU:
+                        self._draw_menu()
+                    elif state == GameState.PAUSED:
+                        self._draw_pause_menu()
+                    elif state == GameState.GAME_OVER:
+                        self._draw_game_over()
             
-            self.clock.tick(self.FPS)
+            if self.time_to_first_frame is None:
+                self.time_to_first_frame = time.perf_counter() - self._start_time
+            
+            self._poll_backgrounds()
+            frame_time = self.clock.tick(self.render_fps) / 1000.0
         
+        if self.trace_path:
+            latency_p50, latency_p99 = self.input.latency_percentiles(50, 99)
+            self.profiler.export(self.trace_path, {
+                'time_to_first_frame_ms': self._first_frame_ms(),
+                'input_latency_p50_ms': latency_p50,
+                'input_latency_p99_ms': latency_p99,
+            })
+        # A game quit mid-level still counts, and must be queued before the writer stops
+        if self.state_manager.current_state in (GameState.PLAYING, GameState.PAUSED):
+            self._end_session()
+        self._save_recording()
+        self.sprite_cache.close()
+        if self.scores is not None:
+            self.scores.close()
         pygame.quit()
     
-    def _draw_menu(self):
-        """Draw main menu."""
-        self.screen.blit(self.menu_bg, (0, 0))
+    def _cached_frame(self, name: str, key: Hashable,
+                      compose: Callable[[pygame.Surface, Hashable], None]) -> pygame.Surface:
+        """
+        Get a full-screen frame for a static screen, composing it on first use.
         
-        title = self.menu_font.render("ASTEROID", True, (100, 150, 255))
-        subtitle = self.menu_font_2.render("ATTACK", True, (200, 200, 255))
-        self.screen.blit(title, title.get_rect(center=(400, 130)))
-        self.screen.blit(subtitle, subtitle.get_rect(center=(400, 180)))
+        One frame is kept per screen name and recomposed only when key changes.
+        """
+        cached = self._frames.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
         
-        mx, my = pygame.mouse.get_pos()
+        frame = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT)).convert()
+        compose(frame, key)
+        self._frames[name] = (key, frame)
+        return frame
+    
+    def _blit_centered(self, surface: pygame.Surface, font: pygame.font.Font, text: str,
+                       color: Tuple[int, int, int], center: Tuple[int, int]):
+        """Blit cached text centered on a point."""
+        text_surface = self.text_cache.render(font, text, color)
+        surface.blit(text_surface, text_surface.get_rect(center=center))
+    
+    def _compose_menu(self, frame: pygame.Surface, hovered: Tuple[bool, bool]):
+        """Compose the main menu with the given button hover states."""
+        frame.blit(self.menu_bg, (0, 0))
         
-        play_btn = pygame.Rect(300, 300, 200, 50)
-        quit_btn = pygame.Rect(300, 380, 200, 50)
+        self._blit_centered(frame, self.menu_font, "ASTEROID", (100, 150, 255), (400, 130))
+        self._blit_centered(frame, self.menu_font_2, "ATTACK", (200, 200, 255), (400, 180))
         
-        play_color = (45, 55, 85) if play_btn.collidepoint((mx, my)) else (60, 70, 100)
-        quit_color = (45, 55, 85) if quit_btn.collidepoint((mx, my)) else (60, 70, 100)
+        play_hover, quit_hover = hovered
+        play_color = (45, 55, 85) if play_hover else (60, 70, 100)
+        quit_color = (45, 55, 85) if quit_hover else (60, 70, 100)
         
-        pygame.draw.rect(self.screen, play_color, play_btn, border_radius=10)
-        pygame.draw.rect(self.screen, quit_color, quit_btn, border_radius=10)
+        pygame.draw.rect(frame, play_color, self.play_btn, border_radius=10)
+        pygame.draw.rect(frame, quit_color, self.quit_btn, border_radius=10)
         
-        play_text = self.menu_font_3.render("PLAY", True, (255, 255, 255))
-        quit_text = self.menu_font_3.render("QUIT", True, (255, 255, 255))
+        self._blit_centered(frame, self.menu_font_3, "PLAY", (255, 255, 255), self.play_btn.center)
+        self._blit_centered(frame, self.menu_font_3, "QUIT", (255, 255, 255), self.quit_btn.center)
+    
+    def _draw_menu(self):
+        """Draw main menu."""
+        mx, my = pygame.mouse.get_pos()
         
-        self.screen.blit(play_text, play_text.get_rect(center=play_btn.center))
-        self.screen.blit(quit_text, quit_text.get_rect(center=quit_btn.center))
+        play_hover = self.play_btn.collidepoint((mx, my))
+        quit_hover = self.quit_btn.collidepoint((mx, my))
         
-        if self.click:
-            if play_btn.collidepoint((mx, my)):
-                self.start_level(1)
-                self.click = False
-            if quit_btn.collidepoint((mx, my)):
-                self.running = False
-                self.click = False
+        frame = self._cached_frame('menu', (play_hover, quit_hover), self._compose_menu)
+        self.screen.blit(frame, (0, 0))
         
+        if self.dirty_rects is not None:
+            self.dirty_rects.invalidate()
         pygame.display.update()
-        self.clock.tick(self.FPS)
     
-    def _draw_pause_menu(self):
-        """Draw pause menu."""
-        self.screen.fill((0, 0, 0))
+    def _compose_pause_menu(self, frame: pygame.Surface, key: Hashable):
+        """Compose the pause menu."""
+        frame.fill((0, 0, 0))
         self.overlay.fill((0, 0, 0, 180))
-        self.screen.blit(self.overlay, (0, 0))
+        frame.blit(self.overlay, (0, 0))
         
-        pause_text = self.menu_font.render("PAUSED", True, (100, 150, 255))
-        self.screen.blit(pause_text, pause_text.get_rect(center=(400, 150)))
-        
-        instructions = self.menu_font_3.render("Press ESC to resume or M for menu", True, (200, 220, 255))
-        self.screen.blit(instructions, instructions.get_rect(center=(400, 270)))
+        self._blit_centered(frame, self.menu_font, "PAUSED", (100, 150, 255), (400, 150))
+        self._blit_centered(frame, self.menu_font_3, "Press ESC to resume or M for menu",
+                            (200, 220, 255), (400, 270))
+    
+    def _draw_pause_menu(self):
+        """Draw pause menu."""
+        frame = self._cached_frame('pause', None, self._compose_pause_menu)
+        self.screen.blit(frame, (0, 0))
         
+        if self.dirty_rects is not None:
+            self.dirty_rects.invalidate()
         pygame.display.update()
-        self.clock.tick(self.FPS)
+    
+    def _compose_game_over(self, frame: pygame.Surface, scores: Tuple[int, int]):
+        """Compose the game over screen for a high score and final score."""
+        high_score, score = scores
+        frame.fill((0, 0, 0))
+        
+        self._blit_centered(frame, self.over_font, "GAME OVER", (255, 255, 255), (400, 200))
+        self._blit_centered(frame, self.score_font, f"High Score: {high_score}",
+                            (255, 255, 255), (400, 280))
+        self._blit_centered(frame, self.score_font, f"Score: {score}", (255, 255, 255), (400, 330))
+        self._blit_centered(frame, self.menu_font_3, "Press E to play again or ESC for menu",
+                            (200, 220, 255), (400, 400))
     
     def _draw_game_over(self):
         """Draw game over screen."""
-        self.screen.fill((0, 0, 0))
-        
-        game_over = self.over_font.render("GAME OVER", True, (255, 255, 255))
-        self.screen.blit(game_over, game_over.get_rect(center=(400, 200)))
-        
-        high_score_text = self.score_font.render(f"High Score: {self.high_score}", True, (255, 255, 255))
-        self.screen.blit(high_score_text, high_score_text.get_rect(center=(400, 280)))
-        
-        current_score = self.score_font.render(f"Score: {self.score}", True, (255, 255, 255))
-        self.screen.blit(current_score, current_score.get_rect(center=(400, 330)))
-        
-        restart_text = self.menu_font_3.render("Press E to play again or ESC for menu", True, (200, 220, 255))
-        self.screen.blit(restart_text, restart_text.get_rect(center=(400, 400)))
+        frame = self._cached_frame('game_over', (self.high_score, self.score), self._compose_game_over)
+        self.screen.blit(frame, (0, 0))
         
+        if self.dirty_rects is not None:
+            self.dirty_rects.invalidate()
         pygame.display.update()
-        self.clock.tick(self.FPS)
+
+
+def print_headless_report(game: Game, ran: int):
+    """Print the tick rate, collision cost and score of a headless run."""
+    collision_us = game.profiler.total('collisions', 'asteroid_collisions') / max(ran, 1) * 1e6
+    print(f"{ran} ticks, {game.ticks_per_second:.0f} ticks/sec, "
+          f"{collision_us:.1f} us/tick collisions, score {game.score}")
 
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Asteroid Attack')
+    parser.add_argument('--headless', type=int, metavar='TICKS',
+                        help='simulate TICKS ticks without a window and report ticks/sec')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='update only the changed screen regions during gameplay')
+    parser.add_argument('--tick-rate', type=int, default=Game.REFERENCE_TICK_RATE,
+                        help='fixed simulation ticks per second')
+    parser.add_argument('--fps', type=int, default=Game.FPS,
+                        help='render frame cap, 0 for uncapped')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='write per-frame phase timings to PATH (.csv or .json) on exit')
+    parser.add_argument('--seed', type=int,
+                        help='seed for all gameplay randomness')
+    parser.add_argument('--precise-collisions', action='store_true',
+                        help='confirm bullet hits against the sprites\' opaque pixels')
+    parser.add_argument('--asteroid-frames', type=int, default=AsteroidSprites.FRAME_COUNT,
+                        help='pre-rendered rotation frames per asteroid variant')
+    parser.add_argument('--sprite-budget', type=float, metavar='MIB',
+                        default=AsteroidSprites.BUDGET / (1024 * 1024),
+                        help='memory budget for the asteroid frames')
+    parser.add_argument('--record', metavar='PATH',
+                        help='record the inputs of the last game to PATH')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='replay a recording headlessly at maximum speed')
+    parser.add_argument('--fixed-quality', action='store_true',
+                        help='keep full particles and screen shake regardless of frame time')
+    parser.add_argument('--leaderboard', action='store_true',
+                        help='print the ten best games and exit')
+    args = parser.parse_args()
+    sprite_options = {
+        'asteroid_frames': args.asteroid_frames,
+        'sprite_budget': int(args.sprite_budget * 1024 * 1024),
+    }
+    
+    if args.leaderboard:
+        scores = ScoreStore()
+        for rank, session in enumerate(scores.leaderboard(), 1):
+            played = time.strftime('%Y-%m-%d %H:%M', time.localtime(session.started_at))
+            print(f"{rank:2d}. {session.score:6d}  {played}  {session.duration:6.0f}s  "
+                  f"{session.asteroids_destroyed} destroyed  {session.avg_frame_ms:.1f} ms/frame")
+        scores.close()
+    elif args.replay:
+        try:
+            recording = InputRecorder.load(args.replay)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        game = Game(headless=True, tick_rate=recording.tick_rate,
+                    precise_collisions=recording.precise_collisions, **sprite_options)
+        ran = recording.replay(game)
+        print_headless_report(game, ran)
+        if args.trace:
+            game.profiler.export(args.trace)
+        pygame.quit()
+    elif args.headless is not None:
+        game = Game(headless=True, tick_rate=args.tick_rate, seed=args.seed,
+                    precise_collisions=args.precise_collisions, **sprite_options)
+        game.record_path = args.record
+        game.start_level(1)
+        ran = game.step(ScriptedKeys([pygame.K_SPACE]), args.headless)
+        game._save_recording()
+        print_headless_report(game, ran)
+        if args.trace:
+            game.profiler.export(args.trace)
+        pygame.quit()
+    else:
+        game = Game(dirty_rects=args.dirty_rects, tick_rate=args.tick_rate,
+                    render_fps=args.fps, seed=args.seed,
+                    precise_collisions=args.precise_collisions, **sprite_options)
+        game.trace_path = args.trace
+        game.record_path = args.record
+        if args.fixed_quality:
+            game.governor = None
+        game.run()
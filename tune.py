@@ -0,0 +1,183 @@
+"""
+Batch simulator for tuning DifficultyScaler.
+
+Plays thousands of headless games across every core with a scripted or
+random-policy player, sweeping a grid of difficulty parameters, and prints
+survival time, score distribution and per-tick cost for each combination.
+
+    python tune.py --games 500 --spawn-scale 0.03 0.05 0.08 --asteroid-cap 8 12 16
+"""
+
+import os
+
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+import argparse
+import csv
+import itertools
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from main import Game, ScriptedKeys
+
+
+PARAMETERS = ('spawn_scale_factor', 'speed_scale_factor', 'max_spawn_rate', 'max_asteroids')
+
+IDLE = ScriptedKeys([pygame.K_SPACE])
+LEFT = ScriptedKeys([pygame.K_LEFT, pygame.K_SPACE])
+RIGHT = ScriptedKeys([pygame.K_RIGHT, pygame.K_SPACE])
+
+_game: Game = None
+
+
+def _init_worker():
+    """Create the headless game each worker process reuses for all its games."""
+    global _game
+    _game = Game(headless=True)
+
+
+def tracker_policy(game: Game, rng: random.Random) -> ScriptedKeys:
+    """Chase the lowest asteroid while firing continuously."""
+    asteroids = game.enemy_manager.asteroids
+    if not asteroids.count:
+        return IDLE
+    lowest = int(np.argmax(asteroids.y[:asteroids.count]))
+    target = asteroids.x[lowest] + asteroids.width[lowest] / 2 - game.player.width / 2
+    if target < game.player.pos.x - game.player.SPEED:
+        return LEFT
+    if target > game.player.pos.x + game.player.SPEED:
+        return RIGHT
+    return IDLE
+
+
+def random_policy(game: Game, rng: random.Random) -> ScriptedKeys:
+    """Mash random directions while firing continuously."""
+    return rng.choice((IDLE, LEFT, RIGHT))
+
+
+POLICIES = {'tracker': tracker_policy, 'random': random_policy}
+
+
+def play_games(params: Dict[str, float], policy: str, seeds: Sequence[int],
+               max_ticks: int) -> List[Tuple[int, int, float]]:
+    """Play one game per seed and return (ticks survived, score, seconds) for each."""
+    game = _game
+    choose = POLICIES[policy]
+    results = []
+    for seed in seeds:
+        scaler = game.difficulty_scaler
+        scaler.spawn_scale_factor = params['spawn_scale_factor']
+        scaler.speed_scale_factor = params['speed_scale_factor']
+        scaler.max_spawn_rate = params['max_spawn_rate']
+        game.enemy_manager.max_asteroids = int(params['max_asteroids'])
+
+        rng = random.Random(seed)
+        game.start_level(1, seed=seed)
+        ticks = 0
+        start = time.perf_counter()
+        while ticks < max_ticks and game.state_manager.is_playing():
+            ticks += game.step(choose(game, rng))
+        results.append((ticks, game.score, time.perf_counter() - start))
+    return results
+
+
+def summarize(params: Dict[str, float], results: List[Tuple[int, int, float]],
+              tick_rate: int) -> Dict[str, float]:
+    """Aggregate the games played for one parameter combination."""
+    ticks = np.array([r[0] for r in results], dtype=np.float64)
+    scores = np.array([r[1] for r in results], dtype=np.float64)
+    seconds = sum(r[2] for r in results)
+    survival = ticks / tick_rate
+
+    summary = dict(params)
+    summary.update({
+        'games': len(results),
+        'survival_mean_s': survival.mean(),
+        'survival_p50_s': np.percentile(survival, 50),
+        'survival_p90_s': np.percentile(survival, 90),
+        'score_mean': scores.mean(),
+        'score_p10': np.percentile(scores, 10),
+        'score_p50': np.percentile(scores, 50),
+        'score_p90': np.percentile(scores, 90),
+        'us_per_tick': seconds / max(ticks.sum(), 1) * 1e6,
+    })
+    return summary
+
+
+def print_table(rows: List[Dict[str, float]]):
+    """Print summaries as an aligned table."""
+    columns = list(rows[0].keys())
+    widths = [max(len(column), 9) for column in columns]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        cells = []
+        for column, width in zip(columns, widths):
+            value = row[column]
+            text = f"{value:.3f}" if isinstance(value, float) else str(value)
+            cells.append(text.rjust(width))
+        print('  '.join(cells))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Sweep DifficultyScaler parameters')
+    parser.add_argument('--games', type=int, default=200,
+                        help='games per parameter combination')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='tracker')
+    parser.add_argument('--spawn-scale', type=float, nargs='+', default=[0.05])
+    parser.add_argument('--speed-scale', type=float, nargs='+', default=[0.01])
+    parser.add_argument('--spawn-cap', type=float, nargs='+', default=[5.0])
+    parser.add_argument('--asteroid-cap', type=int, nargs='+', default=[12])
+    parser.add_argument('--max-minutes', type=float, default=10.0,
+                        help='stop a game that survives this long')
+    parser.add_argument('--batch', type=int, default=25,
+                        help='games per worker task')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes (default: every core)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', metavar='PATH', help='also write the summary table to PATH')
+    args = parser.parse_args()
+
+    max_ticks = int(args.max_minutes * 60 * Game.REFERENCE_TICK_RATE)
+    grid = [
+        dict(zip(PARAMETERS, values))
+        for values in itertools.product(args.spawn_scale, args.speed_scale,
+                                        args.spawn_cap, args.asteroid_cap)
+    ]
+
+    # The same seeds for every combination, so only the parameters differ
+    seeds = [args.seed + i for i in range(args.games)]
+    batches = [seeds[i:i + args.batch] for i in range(0, len(seeds), args.batch)]
+
+    results: Dict[int, List[Tuple[int, int, float]]] = {i: [] for i in range(len(grid))}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(play_games, params, args.policy, batch, max_ticks): i
+            for i, params in enumerate(grid)
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            results[futures[future]].extend(future.result())
+    elapsed = time.perf_counter() - start
+
+    rows = [summarize(params, results[i], Game.REFERENCE_TICK_RATE) for i, params in enumerate(grid)]
+    print_table(rows)
+    print(f"{len(grid) * args.games} games in {elapsed:.1f}s on {args.workers} workers")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())